@@ -0,0 +1,55 @@
+"""
+Campaign matching cost per impression as the campaign count grows to 100k: the inverted index against a linear
+scan over all campaigns.
+"""
+import random
+
+from util import time_it
+
+from ad_bidder.campaign.index import CampaignIndex
+from ad_bidder.campaign.model import Campaign
+from ad_bidder_common.model.openrtb.request import BidRequest, Impression, Banner, Device, Geo
+
+CAMPAIGN_COUNTS = (1_000, 10_000, 100_000)
+SIZES = [(300, 250), (728, 90), (160, 600), (320, 50), (300, 600), (970, 250)]
+COUNTRIES = ["US", "GB", "DE", "FR", "PL", "ES", "IT", "NL", "SE", "JP", "BR", "IN"]
+
+
+def _campaign(i: int) -> Campaign:
+    return Campaign(id=str(i),
+                    banner_sizes=random.sample(SIZES, 1),
+                    device_types=random.sample(range(1, 8), 2),
+                    os=random.sample(["ios", "android", "windows", "macos"], 1),
+                    # every tenth campaign runs in all countries
+                    countries=random.sample(COUNTRIES, 2) if i % 10 else [],
+                    cat=random.sample(["IAB1", "IAB2", "IAB3", "IAB4"], 1))
+
+
+def _linear_match(campaigns: list[Campaign], imp: Impression, bid_request: BidRequest) -> list[str]:
+    device = bid_request.device
+    size = (imp.banner.w, imp.banner.h)
+    return [campaign.id for campaign in campaigns
+            if size in campaign.banner_sizes and device.devicetype in campaign.device_types
+            and device.os in campaign.os and (not campaign.countries or device.geo.country in campaign.countries)
+            and not set(campaign.cat) & set(bid_request.bcat)]
+
+
+def main():
+    imp = Impression(id="1", banner=Banner(id="1", w=300, h=250))
+    bid_request = BidRequest(id="bench", imp=[imp], bcat=["IAB4"],
+                             device=Device(devicetype=2, os="ios", geo=Geo(lat=0.0, lon=0.0, country="US")))
+
+    print(f"{'campaigns':>10} {'matches':>8} {'index us':>9} {'scan us':>9} {'speedup':>8}")
+    for campaign_n in CAMPAIGN_COUNTS:
+        campaigns = [_campaign(i) for i in range(campaign_n)]
+        index = CampaignIndex(campaigns)
+        matches = index.match(imp, bid_request)
+        assert sorted(matches) == sorted(_linear_match(campaigns, imp, bid_request))
+
+        index_us = time_it(lambda: index.match(imp, bid_request), repeat=1000)
+        scan_us = time_it(lambda: _linear_match(campaigns, imp, bid_request), repeat=10)
+        print(f"{campaign_n:>10} {len(matches):>8} {index_us:>9.1f} {scan_us:>9.1f} {scan_us / index_us:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Mongo round trips per bid request in _insert_imps_into_db: legacy find_one + insert_one per impression
+against one unordered bulk_write of upserts.
+"""
+from bson import ObjectId
+from util import CountingCollection
+
+import ad_bidder.db.config as db
+from ad_bidder.bid import service as bid_service
+from ad_bidder_common.model.openrtb.request import Impression, Banner
+
+IMP_COUNTS = (1, 5, 10, 20, 50, 100)
+
+
+def _legacy_insert_imps_into_db(imps: list[Impression]):
+    for imp in imps:
+        if db.get_imp_collection().find_one({"_id": ObjectId(imp.id)}) is None:
+            db.get_imp_collection().insert_one({"_id": ObjectId(imp.id), **imp.dump_mongo()})
+
+
+def main():
+    print(f"{'imps':>6} {'legacy round trips':>20} {'bulk round trips':>18}")
+    for imp_n in IMP_COUNTS:
+        imps = [Impression(id=str(ObjectId()), banner=Banner(id=str(i))) for i in range(imp_n)]
+
+        legacy = CountingCollection()
+        db.get_imp_collection = lambda: legacy
+        _legacy_insert_imps_into_db(imps)
+
+        bulk = CountingCollection()
+        db.get_imp_collection = lambda: bulk
+        errors = bid_service._insert_imps_into_db(imps)
+        assert not errors
+
+        print(f"{imp_n:>6} {legacy.round_trips:>20} {bulk.round_trips:>18}")
+
+
+if __name__ == "__main__":
+    main()
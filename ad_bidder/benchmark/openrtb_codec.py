@@ -0,0 +1,59 @@
+"""
+Encode and decode cost of OpenRTB bodies across payload sizes: the current path (model_dump(mode="json") re-encoded by
+httpx on the way out, FastAPI's json.loads + validation or model_validate_json on the way in) against the openrtb
+codec.
+"""
+import json
+import random
+
+from util import time_it
+
+from ad_bidder_common.model.openrtb import codec
+from ad_bidder_common.model.openrtb.request import BidRequest, Impression, Banner, Device, User, Geo
+from ad_bidder_common.model.openrtb.response import BidResponse, SeatBid, Bid
+
+IMP_COUNTS = (1, 10, 50, 200)
+
+
+def _bid_request(imp_n: int) -> BidRequest:
+    imps = [Impression(id=str(i), banner=Banner(id=str(i), w=random.choice((300, 728)), h=random.choice((250, 90))),
+                       bidfloor=round(random.random(), 2), tagid=f"tag-{i}") for i in range(imp_n)]
+    return BidRequest(id="bench", imp=imps, tmax=300, device=Device(devicetype=2, os="ios", geo=Geo(lat=40.7, lon=-74.0, country="USA")),
+                      user=User(yob=1990, gender="F"))
+
+
+def _bid_response(imp_n: int) -> BidResponse:
+    bids = [Bid(id=str(i), impid=str(i), price=round(random.random() * 10, 2), nurl=f"/api/v1/bids/{i}/notice",
+                cid="campaign") for i in range(imp_n)]
+    return BidResponse(id="bench", seatbid=[SeatBid(bid=bids)])
+
+
+def _legacy_encode(model) -> bytes:
+    return json.dumps(model.model_dump(mode="json")).encode()
+
+
+def _report(name: str, model, model_type):
+    legacy_body = _legacy_encode(model)
+    codec_body = codec.encode(model)
+    assert codec.decode(codec_body, model_type) == model_type.model_validate_json(legacy_body)
+
+    legacy_encode_us = time_it(lambda: _legacy_encode(model))
+    codec_encode_us = time_it(lambda: codec.encode(model))
+    legacy_decode_us = time_it(lambda: model_type.model_validate(json.loads(legacy_body)))
+    validate_json_us = time_it(lambda: model_type.model_validate_json(legacy_body))
+    codec_decode_us = time_it(lambda: codec.decode(codec_body, model_type))
+    print(f"{name:>14} {len(legacy_body):>8} {len(codec_body):>8} {legacy_encode_us:>10.1f} {codec_encode_us:>9.1f} "
+          f"{legacy_decode_us:>10.1f} {validate_json_us:>14.1f} {codec_decode_us:>9.1f}")
+
+
+def main():
+    random.seed(42)
+    print(f"{'body':>14} {'bytes':>8} {'codec':>8} {'encode us':>10} {'codec us':>9} "
+          f"{'decode us':>10} {'validate_json':>14} {'codec us':>9}")
+    for imp_n in IMP_COUNTS:
+        _report(f"request {imp_n}", _bid_request(imp_n), BidRequest)
+        _report(f"response {imp_n}", _bid_response(imp_n), BidResponse)
+
+
+if __name__ == "__main__":
+    main()
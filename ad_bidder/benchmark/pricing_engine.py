@@ -0,0 +1,34 @@
+"""
+Pricing cost per bid request as the imp count grows: the legacy per-imp random loop against the vectorized
+logistic pricing engine (column-wise feature matrix + one matrix-vector product), with the feature matrix share.
+Neither is flat, reading the imp attributes grows linearly with the imp count in both and dominates the engine cost.
+"""
+import random
+
+from util import time_it
+
+from ad_bidder.pricing.engine import build_feature_matrix, load_pricing_engine, _DEFAULT_MODEL_PATH
+from ad_bidder_common.model.openrtb.request import BidRequest, Impression, Banner, Device, User
+
+IMP_COUNTS = (1, 10, 50, 100, 200, 500)
+
+
+def _bid_request(imp_n: int) -> BidRequest:
+    imps = [Impression(id=str(i), banner=Banner(id=str(i), w=random.choice((300, 728)), h=random.choice((250, 90))),
+                       bidfloor=random.random()) for i in range(imp_n)]
+    return BidRequest(id="bench", imp=imps, device=Device(devicetype=2, js=1), user=User(yob=1990, gender="F"))
+
+
+def main():
+    engine = load_pricing_engine(_DEFAULT_MODEL_PATH)
+    print(f"{'imps':>6} {'legacy us':>10} {'engine us':>10} {'features us':>12}")
+    for imp_n in IMP_COUNTS:
+        bid_request = _bid_request(imp_n)
+        legacy_us = time_it(lambda: [round(random.random() * 10, 2) for _ in bid_request.imp], repeat=1000)
+        engine_us = time_it(lambda: engine.price(bid_request.imp, bid_request), repeat=1000)
+        features_us = time_it(lambda: build_feature_matrix(bid_request.imp, bid_request), repeat=1000)
+        print(f"{imp_n:>6} {legacy_us:>10.1f} {engine_us:>10.1f} {features_us:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Mongo round trips per bid request in _create_seat_bid: legacy insert_many + update_one per bid (N+1)
+against the single bulk insert with client-side ObjectIds.
+"""
+import random
+
+from util import CountingCollection
+
+import ad_bidder.db.config as db
+from ad_bidder.bid import service as bid_service
+from ad_bidder.constant import AD_BIDDER_BID_NOTICE, AD_BIDDER_BID_ROOT, compose_path
+from ad_bidder_common.model.openrtb.request import BidRequest, Impression, Banner
+from ad_bidder_common.model.openrtb.response import Bid, SeatBid
+
+IMP_COUNTS = (1, 5, 10, 20, 50, 100)
+
+
+def _legacy_create_seat_bid(imps: list[Impression]) -> SeatBid:
+    bids = [Bid(id="dummy", impid=imp.id, price=round(random.random() * 10, 2), ext={}) for imp in imps]
+    result = db.get_bid_collection().insert_many(map(Bid.dump_mongo, bids))
+    for i, inserted_id in enumerate(result.inserted_ids):
+        bids[i].id = str(inserted_id)
+        bids[i].nurl = compose_path(AD_BIDDER_BID_ROOT, AD_BIDDER_BID_NOTICE.format(bid_id=bids[i].id))
+        db.get_bid_collection().update_one({"_id": inserted_id}, {"$set": {"nurl": bids[i].nurl}})
+    return SeatBid(bid=bids)
+
+
+def _bid_request(imp_n: int) -> BidRequest:
+    imps = [Impression(id=str(i), banner=Banner(id=str(i))) for i in range(imp_n)]
+    return BidRequest(id="bench", imp=imps)
+
+
+def main():
+    print(f"{'imps':>6} {'legacy round trips':>20} {'bulk round trips':>18}")
+    for imp_n in IMP_COUNTS:
+        bid_request = _bid_request(imp_n)
+
+        legacy = CountingCollection()
+        db.get_bid_collection = lambda: legacy
+        _legacy_create_seat_bid(bid_request.imp)
+
+        bulk = CountingCollection()
+        db.get_bid_collection = lambda: bulk
+        seat_bid = bid_service._create_seat_bid(bid_request.imp, bid_request)
+        assert all(bid.nurl is not None for bid in seat_bid.bid)
+
+        print(f"{imp_n:>6} {legacy.round_trips:>20} {bulk.round_trips:>18}")
+
+
+if __name__ == "__main__":
+    main()
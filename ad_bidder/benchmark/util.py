@@ -0,0 +1,65 @@
+"""
+Shared helpers for the ad_bidder micro-benchmarks.
+
+Run benchmarks from the ad_bidder directory with the sources on the path, e.g.
+PYTHONPATH=src:../common/src python benchmark/seat_bid_round_trips.py
+"""
+import os
+import time
+from typing import Any, Callable
+
+os.environ.setdefault("MONGODB_USERNAME", "bench")
+os.environ.setdefault("MONGODB_PASSWORD", "bench")
+os.environ.setdefault("MONGODB_HOST", "localhost")
+os.environ.setdefault("MONGODB_DB_NAME", "bench")
+
+
+class InsertResult:
+    def __init__(self, inserted_ids: list):
+        self.inserted_ids = inserted_ids
+        self.inserted_id = inserted_ids[0] if inserted_ids else None
+
+
+class CountingCollection:
+    """
+    In-memory stand-in for a pymongo collection that counts every call as one round trip.
+    """
+
+    def __init__(self):
+        self.docs = {}
+        self.round_trips = 0
+
+    def insert_one(self, doc: dict) -> InsertResult:
+        self.round_trips += 1
+        return InsertResult(self._insert(doc))
+
+    def insert_many(self, docs, **kwargs) -> InsertResult:
+        self.round_trips += 1
+        return InsertResult([self._insert(doc)[0] for doc in docs])
+
+    def find_one(self, query: dict) -> dict | None:
+        self.round_trips += 1
+        return self.docs.get(query.get("_id"))
+
+    def update_one(self, query: dict, update: dict, **kwargs) -> None:
+        self.round_trips += 1
+
+    def bulk_write(self, requests: list, **kwargs) -> None:
+        self.round_trips += 1
+
+    def _insert(self, doc: dict) -> list:
+        from bson import ObjectId
+
+        doc_id = doc.setdefault("_id", ObjectId())
+        self.docs[doc_id] = doc
+        return [doc_id]
+
+
+def time_it(fn: Callable[[], Any], repeat: int = 100) -> float:
+    """
+    Returns the mean wall time of fn in microseconds.
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
@@ -1,22 +1,38 @@
 import logging as log
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 
+from ad_bidder import config
 from ad_bidder.bid import service as bid_service
+from ad_bidder.bid.model import BidNoticeBatch, BidNoticeBatchResult
 from ad_bidder.constant import *
+from ad_bidder_common.model.openrtb import codec
+from ad_bidder_common.model.openrtb.codec import CodecResponse
 from ad_bidder_common.model.openrtb.request import BidRequest
 from ad_bidder_common.model.openrtb.response import BidResponse
 
 router = APIRouter()
 
-
-@router.post(AD_BIDDER_BID_REQUEST)
-def post_bid_request(bid_request: BidRequest) -> BidResponse:
-    log.debug(str(bid_request.ext))
-    bid_response = bid_service.generate_bid(bid_request)
-    return bid_response
+# bid request and response bodies go through the openrtb codec instead of FastAPI's validation and serialization
+if config.BID_PATH_ASYNC:
+    @router.post(AD_BIDDER_BID_REQUEST, response_model=BidResponse)
+    async def post_bid_request(bid_request: BidRequest = Depends(codec.body_of(BidRequest))) -> CodecResponse:
+        log.debug(str(bid_request.ext))
+        bid_response = await bid_service.generate_bid_async(bid_request)
+        return CodecResponse(bid_response)
+else:
+    @router.post(AD_BIDDER_BID_REQUEST, response_model=BidResponse)
+    def post_bid_request(bid_request: BidRequest = Depends(codec.body_of(BidRequest))) -> CodecResponse:
+        log.debug(str(bid_request.ext))
+        bid_response = bid_service.generate_bid(bid_request)
+        return CodecResponse(bid_response)
 
 
 @router.post(AD_BIDDER_BID_NOTICE)
 def post_notice(bid_id: str, imp_id: str, status: int) -> str | None:
     return bid_service.process_notice(bid_id, imp_id, status)
+
+
+@router.post(AD_BIDDER_BID_NOTICES)
+def post_notices(notice_batch: BidNoticeBatch) -> BidNoticeBatchResult:
+    return bid_service.process_notices(notice_batch.notices)
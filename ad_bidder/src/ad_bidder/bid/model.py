@@ -1,6 +1,31 @@
 from enum import Enum
+from typing import Dict, List
+
+from pydantic import BaseModel
 
 
 class BidStatus(Enum):
     WIN = 1
     LOSS = 2
+
+
+class BidNotice(BaseModel):
+    bid_id: str
+    imp_id: str
+    status: int
+
+
+class BidNoticeBatch(BaseModel):
+    notices: List[BidNotice]
+
+
+class BidNoticeBatchResult(BaseModel):
+    html: Dict[str, str] = {}
+    """
+    Creatives of the won bids, keyed by bid id.
+    """
+
+    errors: Dict[str, str] = {}
+    """
+    Notices that could not be applied, keyed by bid id.
+    """
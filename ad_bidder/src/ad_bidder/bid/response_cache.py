@@ -0,0 +1,43 @@
+import threading
+
+from cachetools import TTLCache
+from prometheus_client import Counter
+
+from ad_bidder import config
+from ad_bidder_common.model.openrtb.response import BidResponse
+
+LOOKUPS = Counter("ad_bidder_response_cache_lookups", "Bid response cache lookups", ["result"])
+EVICTIONS = Counter("ad_bidder_response_cache_evictions", "Bid responses evicted from the cache", ["reason"])
+
+
+class _InstrumentedTTLCache(TTLCache):
+    def popitem(self):
+        item = super().popitem()
+        EVICTIONS.labels("size").inc()
+        return item
+
+    def expire(self, time=None):
+        expired = super().expire(time)
+        if expired:
+            EVICTIONS.labels("ttl").inc(len(expired))
+        return expired
+
+
+_cache = _InstrumentedTTLCache(maxsize=config.RESPONSE_CACHE_MAX_SIZE, ttl=config.RESPONSE_CACHE_TTL_S)
+_lock = threading.Lock()
+
+
+def get(bid_request_id: str | None) -> BidResponse | None:
+    if bid_request_id is None:
+        return None
+    with _lock:
+        bid_response = _cache.get(bid_request_id)
+    LOOKUPS.labels("hit" if bid_response is not None else "miss").inc()
+    return bid_response
+
+
+def put(bid_request_id: str | None, bid_response: BidResponse):
+    if bid_request_id is None:
+        return
+    with _lock:
+        _cache[bid_request_id] = bid_response
@@ -1,12 +1,21 @@
 import logging as log
 import random
 import uuid
-from typing import List
+from typing import List, Dict, Tuple
 
 from bson import ObjectId
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 
+import ad_bidder.campaign.index as campaign_index_service
+import ad_bidder.campaign.pacing as pacing
+import ad_bidder.creative.cache as creative_cache
 import ad_bidder.db.config as db
-from ad_bidder.bid.model import BidStatus
+import ad_bidder.db.write_behind as write_behind
+import ad_bidder.pricing.engine as pricing_engine
+from ad_bidder import config
+from ad_bidder.bid import response_cache
+from ad_bidder.bid.model import BidStatus, BidNotice, BidNoticeBatchResult
 from ad_bidder.constant import AD_BIDDER_BID_NOTICE, AD_BIDDER_BID_ROOT, compose_path
 from ad_bidder_common.model.openrtb.request import BidRequest, Impression
 from ad_bidder_common.model.openrtb.response import BidResponse, SeatBid, Bid
@@ -18,9 +27,31 @@ def generate_bid(bid_request: BidRequest) -> BidResponse:
     if len(bid_request.imp) == 0:
         raise Exception("Amount of impressions cannot be 0")
 
-    _insert_imps_into_db(bid_request.imp)
+    cached_bid_response = _get_cached_bid_response(bid_request)
+    if cached_bid_response is not None:
+        return cached_bid_response
+
+    imp_errors = _insert_imps_into_db(bid_request.imp)
     seat_bid = _create_seat_bid(bid_request.imp, bid_request)
-    bid_response = _create_bid_response(seat_bid, bid_request)
+    bid_response = _create_bid_response(seat_bid, bid_request, imp_errors)
+    _cache_bid_response(bid_request, bid_response)
+    log.debug(f"Generated bid response id={bid_response.id}")
+    return bid_response
+
+
+async def generate_bid_async(bid_request: BidRequest) -> BidResponse:
+    log.debug(f"Processing request id={bid_request.id} with imp count={len(bid_request.imp)} (async)")
+    if len(bid_request.imp) == 0:
+        raise Exception("Amount of impressions cannot be 0")
+
+    cached_bid_response = _get_cached_bid_response(bid_request)
+    if cached_bid_response is not None:
+        return cached_bid_response
+
+    imp_errors = await _insert_imps_into_db_async(bid_request.imp)
+    seat_bid = await _create_seat_bid_async(bid_request.imp, bid_request)
+    bid_response = await _create_bid_response_async(seat_bid, bid_request, imp_errors)
+    _cache_bid_response(bid_request, bid_response)
     log.debug(f"Generated bid response id={bid_response.id}")
     return bid_response
 
@@ -28,54 +59,234 @@ def generate_bid(bid_request: BidRequest) -> BidResponse:
 def process_notice(bid_id: str, imp_id: str, status: int) -> str | None:
     bid_status = BidStatus(status)
     if bid_status == BidStatus.WIN:
-        db.get_bid_collection().update_one({"_id": ObjectId(bid_id)}, {"$set": {"ext.win": True}})
+        _update_bid(bid_id, {"ext.win": True})
+        _record_notice_for_pacing(bid_id, bid_status)
         log.debug(f"Bid {bid_id} won")
         process_result = _get_html(bid_id, imp_id)
     else:
-        db.get_bid_collection().update_one({"_id": ObjectId(bid_id)}, {"$set": {"ext.win": False}})
+        _update_bid(bid_id, {"ext.win": False})
+        _record_notice_for_pacing(bid_id, bid_status)
         log.debug(f"Bid {bid_id} won")
         process_result = None
 
     return process_result
 
 
-def _create_bid_response(seat_bid: SeatBid, bid_request: BidRequest) -> BidResponse:
-    bid_response = BidResponse(id=bid_request.id, seatbid=[seat_bid], bidid=str(uuid.uuid4()))
+def process_notices(notices: List[BidNotice]) -> BidNoticeBatchResult:
+    result = BidNoticeBatchResult()
+    updates = []
+    for notice in notices:
+        if not ObjectId.is_valid(notice.bid_id):
+            result.errors[notice.bid_id] = "invalid bid id"
+            continue
+        try:
+            bid_status = BidStatus(notice.status)
+        except ValueError:
+            result.errors[notice.bid_id] = f"unknown status {notice.status}"
+            continue
+
+        _record_notice_for_pacing(notice.bid_id, bid_status)
+        fields = {"ext.win": bid_status == BidStatus.WIN}
+        if bid_status == BidStatus.WIN:
+            html = _pick_html()
+            fields["ext.result_html"] = html
+            result.html[notice.bid_id] = html
+        updates.append(UpdateOne({"_id": ObjectId(notice.bid_id)}, {"$set": fields}))
+
+    if updates and not _write_behind("bid", updates, follow_up=True):
+        db.get_bid_collection().bulk_write(updates, ordered=False)
+    log.debug(f"Processed {len(updates)} notices, {len(result.html)} won, {len(result.errors)} rejected")
+    return result
+
+
+def _get_cached_bid_response(bid_request: BidRequest) -> BidResponse | None:
+    if not config.RESPONSE_CACHE_ENABLED:
+        return None
+    bid_response = response_cache.get(bid_request.id)
+    if bid_response is not None:
+        log.debug(f"Replayed request id={bid_request.id}, returning cached bid response")
+    return bid_response
+
+
+def _cache_bid_response(bid_request: BidRequest, bid_response: BidResponse):
+    if config.RESPONSE_CACHE_ENABLED:
+        response_cache.put(bid_request.id, bid_response)
 
-    result = db.get_bid_response_collection().insert_one({"_id": ObjectId(bid_request.id), **bid_response.dump_mongo()})
-    bid_response.id = str(result.inserted_id)
+
+def _record_notice_for_pacing(bid_id: str, bid_status: BidStatus):
+    if not config.PACING_ENABLED:
+        return
+    if bid_status == BidStatus.WIN:
+        pacing.record_win(bid_id)
+    else:
+        pacing.record_loss(bid_id)
+
+
+def _create_bid_response(seat_bid: SeatBid, bid_request: BidRequest, imp_errors: Dict[str, str]) -> BidResponse:
+    bid_response = _build_bid_response(seat_bid, bid_request, imp_errors)
+
+    bid_response_doc = {"_id": ObjectId(bid_request.id), **bid_response.dump_mongo()}
+    if not _write_behind("bid_response", [InsertOne(bid_response_doc)]):
+        try:
+            db.get_bid_response_collection().insert_one(bid_response_doc)
+        except DuplicateKeyError:
+            log.warning(f"Bid response for replayed request id={bid_request.id} is already persisted")
+
+    return bid_response
+
+
+async def _create_bid_response_async(seat_bid: SeatBid, bid_request: BidRequest,
+                                     imp_errors: Dict[str, str]) -> BidResponse:
+    bid_response = _build_bid_response(seat_bid, bid_request, imp_errors)
+
+    bid_response_doc = {"_id": ObjectId(bid_request.id), **bid_response.dump_mongo()}
+    if not _write_behind("bid_response", [InsertOne(bid_response_doc)]):
+        try:
+            await db.get_async_bid_response_collection().insert_one(bid_response_doc)
+        except DuplicateKeyError:
+            log.warning(f"Bid response for replayed request id={bid_request.id} is already persisted")
 
     return bid_response
 
 
+def _build_bid_response(seat_bid: SeatBid, bid_request: BidRequest, imp_errors: Dict[str, str]) -> BidResponse:
+    ext = {"imp_errors": imp_errors} if imp_errors else None
+    return BidResponse(id=bid_request.id, seatbid=[seat_bid], bidid=str(uuid.uuid4()), ext=ext)
+
+
 def _create_seat_bid(imps: List[Impression], bid_request: BidRequest) -> SeatBid:
+    bids = _generate_bids(imps, bid_request)
+    bid_docs = list(map(_bid_to_mongo, bids))
+    if bid_docs and not _write_behind("bid", list(map(InsertOne, bid_docs))):
+        db.get_bid_collection().insert_many(bid_docs)
+    return SeatBid(bid=bids)
+
+
+async def _create_seat_bid_async(imps: List[Impression], bid_request: BidRequest) -> SeatBid:
+    bids = _generate_bids(imps, bid_request)
+    bid_docs = list(map(_bid_to_mongo, bids))
+    if bid_docs and not _write_behind("bid", list(map(InsertOne, bid_docs))):
+        await db.get_async_bid_collection().insert_many(bid_docs)
+    return SeatBid(bid=bids)
+
+
+def _generate_bids(imps: List[Impression], bid_request: BidRequest) -> List[Bid]:
+    targeted_imps = _target_imps(imps, bid_request)
+    prices = pricing_engine.get_pricing_engine().price([imp for imp, _ in targeted_imps], bid_request).tolist()
+    # ids are generated client-side so that the nurl is known before the single write
     bids = []
-    for imp in imps:
-        bid = Bid(id="dummy", impid=imp.id, price=round(random.random() * 10, 2), ext={})
+    for (imp, campaign_id), price in zip(targeted_imps, prices):
+        bid_id = str(ObjectId())
+        nurl = compose_path(AD_BIDDER_BID_ROOT, AD_BIDDER_BID_NOTICE.format(bid_id=bid_id))
+        bid = Bid(id=bid_id, impid=imp.id, price=price, nurl=nurl, cid=campaign_id, ext={})
         bids.append(bid)
+        if config.PACING_ENABLED:
+            pacing.record_bid(bid_id, campaign_id, price)
         log.debug(f"Bid for imp id={imp.id} was generated with price={bid.price}")
+    return bids
 
-    result = db.get_bid_collection().insert_many(map(Bid.dump_mongo, bids))
-    for i, inserted_id in enumerate(result.inserted_ids):
-        inserted_id_str = str(inserted_id)
-        bids[i].id = inserted_id_str
-        nurl = compose_path(AD_BIDDER_BID_ROOT, AD_BIDDER_BID_NOTICE.format(bid_id=inserted_id_str))
-        bids[i].nurl = nurl
-        db.get_bid_collection().update_one({"_id": inserted_id}, {"$set": {"nurl": nurl}})
 
-    return SeatBid(bid=bids)
+def _target_imps(imps: List[Impression], bid_request: BidRequest) -> List[Tuple[Impression, str | None]]:
+    if not config.CAMPAIGN_TARGETING_ENABLED:
+        return [(imp, None) for imp in imps]
+
+    campaign_index = campaign_index_service.get_campaign_index()
+    targeted_imps = []
+    for imp in imps:
+        campaign_ids = campaign_index.match(imp, bid_request)
+        if not campaign_ids:
+            log.debug(f"No campaign matches imp id={imp.id}")
+            continue
+
+        if config.PACING_ENABLED:
+            campaign_id = next((campaign_id for campaign_id in random.sample(campaign_ids, len(campaign_ids))
+                                if pacing.allow(campaign_index.get(campaign_id))), None)
+            if campaign_id is None:
+                log.debug(f"All campaigns matching imp id={imp.id} are throttled")
+                pacing.record_throttled_imp()
+                continue
+        else:
+            campaign_id = random.choice(campaign_ids)
+        targeted_imps.append((imp, campaign_id))
+    return targeted_imps
 
 
-def _insert_imps_into_db(imps: list[Impression]):
+def _bid_to_mongo(bid: Bid) -> dict:
+    return {"_id": ObjectId(bid.id), **bid.dump_mongo()}
+
+
+def _insert_imps_into_db(imps: list[Impression]) -> Dict[str, str]:
+    upserts, upserted_imps, errors = _build_imp_upserts(imps)
+    if upserts and not _write_behind("imp", upserts):
+        try:
+            db.get_imp_collection().bulk_write(upserts, ordered=False)
+        except BulkWriteError as e:
+            _collect_imp_write_errors(e, upserted_imps, errors)
+    return errors
+
+
+async def _insert_imps_into_db_async(imps: list[Impression]) -> Dict[str, str]:
+    upserts, upserted_imps, errors = _build_imp_upserts(imps)
+    if upserts and not _write_behind("imp", upserts):
+        try:
+            await db.get_async_imp_collection().bulk_write(upserts, ordered=False)
+        except BulkWriteError as e:
+            _collect_imp_write_errors(e, upserted_imps, errors)
+    return errors
+
+
+def _build_imp_upserts(imps: list[Impression]) -> Tuple[List[UpdateOne], List[Impression], Dict[str, str]]:
+    upserts = []
+    upserted_imps = []
+    errors = {}
+    seen_ids = set()
     for imp in imps:
-        # TODO WARNING possible id clash
-        find_result = db.get_imp_collection().find_one({"_id": ObjectId(imp.id)})
-        if find_result is None:
-            insert_result = db.get_imp_collection().insert_one({"_id": ObjectId(imp.id), **imp.dump_mongo()})
-            imp.id = str(insert_result.inserted_id)
+        if not ObjectId.is_valid(imp.id):
+            errors[imp.id] = "invalid impression id"
+        elif imp.id in seen_ids:
+            errors[imp.id] = "duplicate impression id in request"
+        else:
+            seen_ids.add(imp.id)
+            upserts.append(UpdateOne({"_id": ObjectId(imp.id)}, {"$setOnInsert": imp.dump_mongo()}, upsert=True))
+            upserted_imps.append(imp)
+            continue
+        log.warning(f"Impression id={imp.id} was not persisted: {errors[imp.id]}")
+    return upserts, upserted_imps, errors
+
+
+def _collect_imp_write_errors(e: BulkWriteError, upserted_imps: List[Impression], errors: Dict[str, str]):
+    for write_error in e.details.get("writeErrors", []):
+        imp = upserted_imps[write_error["index"]]
+        errors[imp.id] = write_error.get("errmsg", "write error")
+        log.warning(f"Impression id={imp.id} was not persisted: {errors[imp.id]}")
+
+
+def _update_bid(bid_id: str, fields: dict):
+    query, update = {"_id": ObjectId(bid_id)}, {"$set": fields}
+    if not _write_behind("bid", [UpdateOne(query, update)], follow_up=True):
+        db.get_bid_collection().update_one(query, update)
+
+
+def _write_behind(collection_name: str, requests: list, follow_up: bool = False) -> bool:
+    return config.WRITE_BEHIND_ENABLED and write_behind.offer(collection_name, requests, follow_up)
 
 
 def _get_html(bid_id: str, imp_id: str) -> str:
+    result_html = _pick_html()
+    _update_bid(bid_id, {"ext.result_html": result_html})
+
+    return result_html
+
+
+def _pick_html() -> str:
+    result_html = creative_cache.get_random_html() if config.CREATIVE_CACHE_ENABLED else None
+    if result_html is None:
+        result_html = _get_random_html_from_db()
+    log.debug(f"Generated html: {result_html}")
+    return result_html
+
+
+def _get_random_html_from_db() -> str:
     html_count = db.get_html_collection().estimated_document_count()
     log.debug(f"{html_count} elements in html collection")
 
@@ -83,9 +294,4 @@ def _get_html(bid_id: str, imp_id: str) -> str:
     log.debug(f"Getting {skip_n}th element")
 
     cursor = db.get_html_collection().aggregate([{"$skip": skip_n}, {"$limit": 1}])
-    result_html = list(cursor)[0]["html"]
-    log.debug(f"Generated html: {result_html}")
-
-    db.get_bid_collection().update_one({"_id": ObjectId(bid_id)}, {"$set": {"ext.result_html": result_html}})
-
-    return result_html
+    return list(cursor)[0]["html"]
@@ -0,0 +1,120 @@
+import asyncio
+import logging as log
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Set
+
+import ad_bidder.db.config as db
+from ad_bidder import config
+from ad_bidder.campaign.model import Campaign
+from ad_bidder_common.model.openrtb.request import BidRequest, Impression
+
+_EMPTY: frozenset = frozenset()
+
+DIMENSIONS = ("banner_size", "device_type", "os", "country")
+
+
+class CampaignIndex:
+    """
+    Inverted index of campaign targeting. Every dimension keeps a posting set per value plus the set of campaigns
+    that do not restrict it. Matching starts from the smallest candidate set and narrows it with set intersections,
+    so its cost follows the candidates of the most selective dimension, not the number of campaigns.
+    """
+
+    def __init__(self, campaigns: Iterable[Campaign]):
+        self._campaigns: Dict[str, Campaign] = {}
+        self._postings: Dict[str, Dict[Any, Set[str]]] = {dimension: defaultdict(set) for dimension in DIMENSIONS}
+        self._unrestricted: Dict[str, Set[str]] = {dimension: set() for dimension in DIMENSIONS}
+
+        for campaign in campaigns:
+            self._campaigns[campaign.id] = campaign
+            for dimension, values in _campaign_targeting(campaign).items():
+                if values:
+                    for value in values:
+                        self._postings[dimension][value].add(campaign.id)
+                else:
+                    self._unrestricted[dimension].add(campaign.id)
+
+    def __len__(self) -> int:
+        return len(self._campaigns)
+
+    def get(self, campaign_id: str) -> Campaign | None:
+        return self._campaigns.get(campaign_id)
+
+    def match(self, imp: Impression, bid_request: BidRequest) -> List[str]:
+        keys = _imp_keys(imp, bid_request)
+        candidates = sorted(((self._postings[dimension].get(keys[dimension], _EMPTY), self._unrestricted[dimension])
+                             for dimension in DIMENSIONS), key=lambda sets: len(sets[0]) + len(sets[1]))
+
+        posting, unrestricted = candidates[0]
+        matches = posting | unrestricted if unrestricted else posting
+        for posting, unrestricted in candidates[1:]:
+            if not matches:
+                return []
+            # set & iterates the smaller operand, so no union of the larger sets is built
+            matches = (matches & posting) | (matches & unrestricted)
+
+        if not bid_request.bcat:
+            return list(matches)
+        bcat = set(bid_request.bcat)
+        return [campaign_id for campaign_id in matches if bcat.isdisjoint(self._campaigns[campaign_id].cat)]
+
+
+def _campaign_targeting(campaign: Campaign) -> Dict[str, Iterable[Any]]:
+    return {
+        "banner_size": [tuple(size) for size in campaign.banner_sizes],
+        "device_type": campaign.device_types,
+        "os": [os_name.lower() for os_name in campaign.os],
+        "country": [country.upper() for country in campaign.countries],
+    }
+
+
+def _imp_keys(imp: Impression, bid_request: BidRequest) -> Dict[str, Any]:
+    device = bid_request.device
+    geo = device.geo if device is not None and device.geo is not None else None
+    if geo is None and bid_request.user is not None:
+        geo = bid_request.user.geo
+    return {
+        "banner_size": (imp.banner.w, imp.banner.h),
+        "device_type": device.devicetype if device is not None else None,
+        "os": device.os.lower() if device is not None and device.os else None,
+        "country": geo.country.upper() if geo is not None and geo.country else None,
+    }
+
+
+_campaign_index = CampaignIndex([])
+_refresh_task: asyncio.Task | None = None
+
+
+def init_campaign_index():
+    refresh_campaign_index()
+
+
+def refresh_campaign_index():
+    global _campaign_index
+    campaigns = Campaign.validate_mongo_many(db.get_campaign_collection().find())
+    # built aside and swapped in one assignment so that in-flight requests keep a consistent index
+    _campaign_index = CampaignIndex(campaigns)
+    log.debug(f"Campaign index refreshed: {len(_campaign_index)} campaigns")
+
+
+def start_campaign_index_refresh():
+    global _refresh_task
+    _refresh_task = asyncio.create_task(_refresh_loop())
+
+
+def shutdown_campaign_index():
+    if _refresh_task is not None:
+        _refresh_task.cancel()
+
+
+def get_campaign_index() -> CampaignIndex:
+    return _campaign_index
+
+
+async def _refresh_loop():
+    while True:
+        await asyncio.sleep(config.CAMPAIGN_REFRESH_INTERVAL_S)
+        try:
+            await asyncio.to_thread(refresh_campaign_index)
+        except Exception as e:
+            log.error(f"Campaign index refresh failed: {e}")
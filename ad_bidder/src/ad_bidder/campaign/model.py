@@ -0,0 +1,37 @@
+from typing import List, Tuple
+
+from pydantic import BaseModel
+
+from ad_bidder_common.model.openrtb.util import MongoDbMixin
+
+
+class Campaign(BaseModel, MongoDbMixin):
+    """
+    Targeting criteria of a campaign. An empty list means the campaign does not restrict that dimension.
+    """
+
+    id: str
+    name: str | None = None
+    banner_sizes: List[Tuple[int, int]] = []
+    device_types: List[int] = []
+    os: List[str] = []
+    countries: List[str] = []
+    cat: List[str] = []
+    """
+    IAB categories of the campaign creatives, matched against BidRequest.bcat.
+    """
+
+    budget: float | None = None
+    """
+    Total spend limit, None for unlimited. A won impression costs its CPM price / 1000.
+    """
+
+    max_qps: float | None = None
+    """
+    Bids per second the campaign may place across all bidder workers, None for unlimited.
+    """
+
+    spent: float = 0.0
+    """
+    Spend reconciled from all bidder workers.
+    """
@@ -0,0 +1,180 @@
+import asyncio
+import logging as log
+import threading
+import time
+from collections import OrderedDict
+from enum import Enum
+from typing import Dict, Tuple
+
+from bson import ObjectId
+from prometheus_client import Counter
+from pymongo import UpdateOne
+
+import ad_bidder.db.config as db
+from ad_bidder import config
+from ad_bidder.campaign.model import Campaign
+
+PACING_DECISIONS = Counter("ad_bidder_pacing_decisions", "Pacing decisions taken for matched campaigns", ["decision"])
+THROTTLED_BIDS = Counter("ad_bidder_pacing_throttled_bids",
+                         "Impressions left without a bid because every matching campaign was throttled")
+
+
+class PacingDecision(str, Enum):
+    ALLOWED = "allowed"
+    THROTTLED_QPS = "throttled_qps"
+    THROTTLED_BUDGET = "throttled_budget"
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self._capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+
+    def try_acquire(self) -> bool:
+        now = time.monotonic()
+        self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self._tokens < 1.0:
+            return False
+        self._tokens -= 1.0
+        return True
+
+
+class CampaignPacer:
+    """
+    Worker-local pacing state of a campaign. Between reconciliations a worker may spend its share of the remaining
+    budget and place its share of the campaign QPS, so the overspend across workers is bounded by the bids in flight.
+    """
+
+    def __init__(self, campaign: Campaign, worker_count: int):
+        self.unreconciled_spend = 0.0
+        self._worker_count = worker_count
+        self._allowance: float | None = None
+        self._bucket: TokenBucket | None = None
+        self.update(campaign)
+
+    def update(self, campaign: Campaign):
+        if campaign.budget is None:
+            self._allowance = None
+        else:
+            self._allowance = max(0.0, campaign.budget - campaign.spent) / self._worker_count
+
+        if campaign.max_qps is None:
+            self._bucket = None
+        else:
+            rate = campaign.max_qps / self._worker_count
+            if self._bucket is None or self._bucket.rate != rate:
+                self._bucket = TokenBucket(rate, max(1.0, rate))
+
+    def decide(self) -> PacingDecision:
+        if self._allowance is not None and self.unreconciled_spend >= self._allowance:
+            return PacingDecision.THROTTLED_BUDGET
+        if self._bucket is not None and not self._bucket.try_acquire():
+            return PacingDecision.THROTTLED_QPS
+        return PacingDecision.ALLOWED
+
+
+_pacers: Dict[str, CampaignPacer] = {}
+_issued_bids: OrderedDict[str, Tuple[str, float]] = OrderedDict()
+_lock = threading.Lock()
+_reconcile_task: asyncio.Task | None = None
+
+
+def allow(campaign: Campaign) -> bool:
+    with _lock:
+        pacer = _pacers.get(campaign.id)
+        if pacer is None:
+            pacer = _pacers[campaign.id] = CampaignPacer(campaign, config.PACING_WORKER_COUNT)
+        decision = pacer.decide()
+    PACING_DECISIONS.labels(decision.value).inc()
+    return decision == PacingDecision.ALLOWED
+
+
+def record_throttled_imp():
+    THROTTLED_BIDS.inc()
+
+
+def record_bid(bid_id: str, campaign_id: str, price: float):
+    with _lock:
+        _issued_bids[bid_id] = (campaign_id, price)
+        while len(_issued_bids) > config.PACING_MAX_PENDING_BIDS:
+            _issued_bids.popitem(last=False)
+
+
+def record_win(bid_id: str):
+    with _lock:
+        issued_bid = _issued_bids.pop(bid_id, None)
+        if issued_bid is None:
+            log.debug(f"Won bid id={bid_id} is unknown to pacing, spend not debited")
+            return
+        campaign_id, price = issued_bid
+        pacer = _pacers.get(campaign_id)
+        if pacer is not None:
+            pacer.unreconciled_spend += price / 1000
+
+
+def record_loss(bid_id: str):
+    with _lock:
+        _issued_bids.pop(bid_id, None)
+
+
+def reconcile():
+    """
+    Adds the local spend to the shared campaign documents and reloads budgets and spend of all workers.
+    """
+    with _lock:
+        spends = {campaign_id: pacer.unreconciled_spend for campaign_id, pacer in _pacers.items()
+                  if pacer.unreconciled_spend > 0}
+        for campaign_id, spend in spends.items():
+            _pacers[campaign_id].unreconciled_spend -= spend
+        campaign_ids = [ObjectId(campaign_id) for campaign_id in _pacers]
+
+    if spends:
+        try:
+            db.get_campaign_collection().bulk_write(
+                [UpdateOne({"_id": ObjectId(campaign_id)}, {"$inc": {"spent": spend}})
+                 for campaign_id, spend in spends.items()], ordered=False)
+        except Exception:
+            with _lock:
+                for campaign_id, spend in spends.items():
+                    _pacers[campaign_id].unreconciled_spend += spend
+            raise
+
+    projection = {"budget": 1, "max_qps": 1, "spent": 1}
+    # read before taking the lock, allow() takes it on every bid
+    campaigns = list(db.get_campaign_collection().find({"_id": {"$in": campaign_ids}}, projection))
+    with _lock:
+        for doc in campaigns:
+            pacer = _pacers.get(str(doc["_id"]))
+            if pacer is not None:
+                pacer.update(Campaign.validate_mongo(doc))
+
+
+def check_pacing_config():
+    """
+    Pacing debits the campaign a bid was placed for, without campaign targeting bids have no campaign.
+    """
+    if config.PACING_ENABLED and not config.CAMPAIGN_TARGETING_ENABLED:
+        raise Exception("PACING_ENABLED requires CAMPAIGN_TARGETING_ENABLED, bids carry no campaign to pace")
+
+
+def start_pacing_reconciliation():
+    global _reconcile_task
+    _reconcile_task = asyncio.create_task(_reconcile_loop())
+
+
+async def shutdown_pacing():
+    if _reconcile_task is not None:
+        _reconcile_task.cancel()
+    await asyncio.to_thread(reconcile)
+
+
+async def _reconcile_loop():
+    while True:
+        await asyncio.sleep(config.PACING_RECONCILE_INTERVAL_S)
+        try:
+            await asyncio.to_thread(reconcile)
+        except Exception as e:
+            log.error(f"Pacing reconciliation failed: {e}")
@@ -8,3 +8,35 @@ MONGODB_USERNAME = config("MONGODB_USERNAME")
 MONGODB_PASSWORD = config("MONGODB_PASSWORD")
 MONGODB_HOST = config("MONGODB_HOST")
 MONGODB_DB_NAME = config("MONGODB_DB_NAME")
+# async (motor) or sync (pymongo in the threadpool) bid request path
+BID_PATH_ASYNC = config("BID_PATH_ASYNC", default=True, cast=bool)
+CREATIVE_CACHE_ENABLED = config("CREATIVE_CACHE_ENABLED", default=True, cast=bool)
+CREATIVE_CACHE_MAX_BYTES = config("CREATIVE_CACHE_MAX_BYTES", default=64 * 1024 * 1024, cast=int)
+CREATIVE_CACHE_REFRESH_INTERVAL_S = config("CREATIVE_CACHE_REFRESH_INTERVAL_S", default=60.0, cast=float)
+# creatives picked while missing from the cache are loaded in the background at this interval
+CREATIVE_CACHE_MISS_LOAD_INTERVAL_S = config("CREATIVE_CACHE_MISS_LOAD_INTERVAL_S", default=1.0, cast=float)
+# write-behind persistence of bid_response, bid and imp records
+WRITE_BEHIND_ENABLED = config("WRITE_BEHIND_ENABLED", default=False, cast=bool)
+WRITE_BEHIND_QUEUE_SIZE = config("WRITE_BEHIND_QUEUE_SIZE", default=100_000, cast=int)
+WRITE_BEHIND_BATCH_SIZE = config("WRITE_BEHIND_BATCH_SIZE", default=1000, cast=int)
+WRITE_BEHIND_FLUSH_INTERVAL_S = config("WRITE_BEHIND_FLUSH_INTERVAL_S", default=0.1, cast=float)
+# write_through, drop_newest or drop_oldest
+WRITE_BEHIND_FULL_POLICY = config("WRITE_BEHIND_FULL_POLICY", default="write_through")
+# retries of a batch after a connection failure, the backoff doubles per retry
+WRITE_BEHIND_MAX_RETRIES = config("WRITE_BEHIND_MAX_RETRIES", default=3, cast=int)
+WRITE_BEHIND_RETRY_BACKOFF_S = config("WRITE_BEHIND_RETRY_BACKOFF_S", default=0.1, cast=float)
+# random or model; the model file defaults to the bundled pricing/default_model.json
+PRICING_ENGINE = config("PRICING_ENGINE", default="random")
+PRICING_MODEL_PATH = config("PRICING_MODEL_PATH", default="")
+# bid only on impressions matched by a campaign from the campaign collection
+CAMPAIGN_TARGETING_ENABLED = config("CAMPAIGN_TARGETING_ENABLED", default=False, cast=bool)
+CAMPAIGN_REFRESH_INTERVAL_S = config("CAMPAIGN_REFRESH_INTERVAL_S", default=60.0, cast=float)
+# per-campaign budget and QPS pacing, requires campaign targeting
+PACING_ENABLED = config("PACING_ENABLED", default=False, cast=bool)
+PACING_WORKER_COUNT = config("PACING_WORKER_COUNT", default=1, cast=int)
+PACING_RECONCILE_INTERVAL_S = config("PACING_RECONCILE_INTERVAL_S", default=5.0, cast=float)
+PACING_MAX_PENDING_BIDS = config("PACING_MAX_PENDING_BIDS", default=100_000, cast=int)
+# replayed bid request ids get the cached bid response
+RESPONSE_CACHE_ENABLED = config("RESPONSE_CACHE_ENABLED", default=True, cast=bool)
+RESPONSE_CACHE_MAX_SIZE = config("RESPONSE_CACHE_MAX_SIZE", default=10_000, cast=int)
+RESPONSE_CACHE_TTL_S = config("RESPONSE_CACHE_TTL_S", default=60.0, cast=float)
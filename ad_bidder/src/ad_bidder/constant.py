@@ -4,6 +4,7 @@ AD_BIDDER_BID_ROOT = "/bids"
 AD_BIDDER_BID_REQUEST = "/request"
 AD_BIDDER_BID_METRICS = "/metrics"
 AD_BIDDER_BID_NOTICE = "/{bid_id}/notice"
+AD_BIDDER_BID_NOTICES = "/notices"
 
 
 def compose_path(root: str, *path_elements: str) -> str:
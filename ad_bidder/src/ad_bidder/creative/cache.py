@@ -0,0 +1,202 @@
+import asyncio
+import logging as log
+import random
+import sys
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Tuple, Set
+
+from bson import ObjectId
+
+import ad_bidder.db.config as db
+from ad_bidder import config
+
+_LOAD_BATCH_SIZE = 1000
+
+
+class CreativeCache:
+    """
+    Bounded in-memory creative store. Entries are kept in LRU order, a creative read through put evicts the least
+    recently used ones when the budget is exceeded.
+    """
+
+    def __init__(self, max_bytes: int):
+        self._max_bytes = max_bytes
+        self._size_bytes = 0
+        self._entries: OrderedDict[str, str] = OrderedDict()
+        # cached ids in no particular order and their positions, for uniform random picks
+        self._ids: List[str] = []
+        self._positions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._size_bytes
+
+    def get(self, creative_id: str) -> str | None:
+        with self._lock:
+            html = self._entries.get(creative_id)
+            if html is not None:
+                self._entries.move_to_end(creative_id)
+            return html
+
+    def get_random(self) -> str | None:
+        with self._lock:
+            if not self._ids:
+                return None
+            creative_id = random.choice(self._ids)
+            self._entries.move_to_end(creative_id)
+            return self._entries[creative_id]
+
+    def put(self, creative_id: str, html: str):
+        with self._lock:
+            self._put(creative_id, html, evict=True)
+
+    def load(self, creatives: Iterable[Tuple[str, str]]):
+        """
+        Merges a batch of a catalog snapshot. Known creatives are updated in place, new ones are only added
+        while they fit into the budget so that a refresh never evicts the hot entries.
+        """
+        with self._lock:
+            for creative_id, html in creatives:
+                self._put(creative_id, html, evict=False)
+
+    def retain(self, creative_ids: Set[str]):
+        with self._lock:
+            for creative_id in [creative_id for creative_id in self._entries if creative_id not in creative_ids]:
+                self._remove(creative_id)
+
+    def _put(self, creative_id: str, html: str, evict: bool):
+        entry_size = _entry_size(creative_id, html)
+        if entry_size > self._max_bytes:
+            log.warning(f"Creative id={creative_id} of {entry_size} bytes exceeds the creative cache budget")
+            return
+
+        if creative_id in self._entries:
+            self._size_bytes += entry_size - _entry_size(creative_id, self._entries[creative_id])
+            self._entries[creative_id] = html
+        elif self._size_bytes + entry_size <= self._max_bytes or evict:
+            self._entries[creative_id] = html
+            self._positions[creative_id] = len(self._ids)
+            self._ids.append(creative_id)
+            self._size_bytes += entry_size
+        else:
+            return
+
+        while self._size_bytes > self._max_bytes:
+            lru_id = next(iter(self._entries))
+            self._remove(lru_id)
+
+    def _remove(self, creative_id: str):
+        html = self._entries.pop(creative_id)
+        self._size_bytes -= _entry_size(creative_id, html)
+        position = self._positions.pop(creative_id)
+        last_id = self._ids.pop()
+        if last_id != creative_id:
+            self._ids[position] = last_id
+            self._positions[last_id] = position
+
+
+def _entry_size(creative_id: str, html: str) -> int:
+    return sys.getsizeof(creative_id) + sys.getsizeof(html)
+
+
+_creative_cache: CreativeCache | None = None
+# ids of the whole catalog, also of the creatives that do not fit into the cache budget
+_catalog_ids: List[str] = []
+# creatives picked while missing from the cache, loaded in the background instead of on the bid path
+_missed_ids: Set[str] = set()
+_missed_lock = threading.Lock()
+_refresh_task: asyncio.Task | None = None
+_miss_load_task: asyncio.Task | None = None
+
+
+def init_creative_cache():
+    global _creative_cache
+    _creative_cache = CreativeCache(config.CREATIVE_CACHE_MAX_BYTES)
+    refresh_creative_cache()
+
+
+def refresh_creative_cache():
+    global _catalog_ids
+    seen_ids = set()
+    batch = []
+    for doc in db.get_html_collection().find({}, {"html": 1}, batch_size=_LOAD_BATCH_SIZE):
+        creative_id = str(doc["_id"])
+        seen_ids.add(creative_id)
+        batch.append((creative_id, doc["html"]))
+        if len(batch) == _LOAD_BATCH_SIZE:
+            _creative_cache.load(batch)
+            batch = []
+    _creative_cache.load(batch)
+    _creative_cache.retain(seen_ids)
+    _catalog_ids = list(seen_ids)
+    log.debug(f"Creative cache refreshed: {len(_creative_cache)} of {len(seen_ids)} creatives, "
+              f"{_creative_cache.size_bytes} bytes")
+
+
+def load_missed_creatives():
+    """
+    Reads the creatives picked while missing from the cache through it, evicting the least recently used ones.
+    """
+    global _missed_ids
+    with _missed_lock:
+        missed_ids, _missed_ids = _missed_ids, set()
+    if not missed_ids:
+        return
+    for doc in db.get_html_collection().find({"_id": {"$in": [ObjectId(creative_id) for creative_id in missed_ids]}},
+                                             {"html": 1}):
+        _creative_cache.put(str(doc["_id"]), doc["html"])
+
+
+def start_creative_cache_refresh():
+    global _refresh_task, _miss_load_task
+    _refresh_task = asyncio.create_task(_refresh_loop())
+    _miss_load_task = asyncio.create_task(_miss_load_loop())
+
+
+def shutdown_creative_cache():
+    for task in (_refresh_task, _miss_load_task):
+        if task is not None:
+            task.cancel()
+
+
+def get_creative_cache() -> CreativeCache:
+    return _creative_cache
+
+
+def get_random_html() -> str | None:
+    """
+    Picks a creative from the whole catalog without reading Mongo. When the catalog is larger than the budget and the
+    pick is missing from the cache, a cached creative is served instead and the pick is loaded in the background.
+    """
+    if _creative_cache is None or not _catalog_ids:
+        return None
+    creative_id = random.choice(_catalog_ids)
+    html = _creative_cache.get(creative_id)
+    if html is None:
+        with _missed_lock:
+            _missed_ids.add(creative_id)
+        html = _creative_cache.get_random()
+    return html
+
+
+async def _refresh_loop():
+    while True:
+        await asyncio.sleep(config.CREATIVE_CACHE_REFRESH_INTERVAL_S)
+        try:
+            await asyncio.to_thread(refresh_creative_cache)
+        except Exception as e:
+            log.error(f"Creative cache refresh failed: {e}")
+
+
+async def _miss_load_loop():
+    while True:
+        await asyncio.sleep(config.CREATIVE_CACHE_MISS_LOAD_INTERVAL_S)
+        try:
+            await asyncio.to_thread(load_missed_creatives)
+        except Exception as e:
+            log.error(f"Creative cache miss load failed: {e}")
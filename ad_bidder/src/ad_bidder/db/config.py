@@ -1,5 +1,6 @@
 import logging as log
 
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection
 from pymongo import MongoClient
 from pymongo.collection import Collection
 
@@ -12,12 +13,24 @@ _bid_response_collection: Collection | None = None
 _bid_collection: Collection | None = None
 _imp_collection: Collection | None = None
 _html_collection: Collection | None = None
+_campaign_collection: Collection | None = None
+
+_async_mongodb_client: AsyncIOMotorClient | None = None
+
+_async_bid_response_collection: AsyncIOMotorCollection | None = None
+_async_bid_collection: AsyncIOMotorCollection | None = None
+_async_imp_collection: AsyncIOMotorCollection | None = None
+_async_html_collection: AsyncIOMotorCollection | None = None
+
+
+def _mongodb_url() -> str:
+    return f"mongodb://{config.MONGODB_USERNAME}:{config.MONGODB_PASSWORD}@{config.MONGODB_HOST}"
 
 
 def init_db_client():
-    global _mongodb_client, _test_collection, _bid_response_collection, _bid_collection, _imp_collection, _html_collection
-    url = f"mongodb://{config.MONGODB_USERNAME}:{config.MONGODB_PASSWORD}@{config.MONGODB_HOST}"
-    _mongodb_client = MongoClient(url, serverSelectionTimeoutMS=3000)
+    global _mongodb_client, _test_collection, _bid_response_collection, _bid_collection, _imp_collection, _html_collection, \
+        _campaign_collection
+    _mongodb_client = MongoClient(_mongodb_url(), serverSelectionTimeoutMS=3000)
     _mongodb_client.server_info()
     log.debug("Connected to the MongoDB database!")
 
@@ -27,10 +40,31 @@ def init_db_client():
     _bid_collection = db.bid
     _imp_collection = db.imp
     _html_collection = db.html
+    _campaign_collection = db.campaign
+
+
+async def init_async_db_client():
+    global _async_mongodb_client, _async_bid_response_collection, _async_bid_collection, _async_imp_collection, \
+        _async_html_collection
+    _async_mongodb_client = AsyncIOMotorClient(_mongodb_url(), serverSelectionTimeoutMS=3000)
+    await _async_mongodb_client.server_info()
+    log.debug("Connected to the MongoDB database (async)!")
+
+    db = _async_mongodb_client[config.MONGODB_DB_NAME]
+    _async_bid_response_collection = db.bid_response
+    _async_bid_collection = db.bid
+    _async_imp_collection = db.imp
+    _async_html_collection = db.html
 
 
 def shutdown_db_client():
     _mongodb_client.close()
+    if _async_mongodb_client is not None:
+        _async_mongodb_client.close()
+
+
+def get_collection(name: str) -> Collection:
+    return _mongodb_client[config.MONGODB_DB_NAME][name]
 
 
 def get_test_collection() -> Collection:
@@ -51,3 +85,23 @@ def get_imp_collection() -> Collection:
 
 def get_html_collection() -> Collection:
     return _html_collection
+
+
+def get_campaign_collection() -> Collection:
+    return _campaign_collection
+
+
+def get_async_bid_response_collection() -> AsyncIOMotorCollection:
+    return _async_bid_response_collection
+
+
+def get_async_bid_collection() -> AsyncIOMotorCollection:
+    return _async_bid_collection
+
+
+def get_async_imp_collection() -> AsyncIOMotorCollection:
+    return _async_imp_collection
+
+
+def get_async_html_collection() -> AsyncIOMotorCollection:
+    return _async_html_collection
@@ -0,0 +1,147 @@
+import asyncio
+import logging as log
+import threading
+import time
+from collections import deque, defaultdict
+from enum import Enum
+from typing import Any, Deque, List, Tuple
+
+from prometheus_client import Counter, Gauge, Histogram
+from pymongo.errors import BulkWriteError, ConnectionFailure, PyMongoError
+
+import ad_bidder.db.config as db
+from ad_bidder import config
+
+QUEUE_DEPTH = Gauge("ad_bidder_write_behind_queue_depth", "Records waiting in the write-behind queue")
+FLUSH_LATENCY = Histogram("ad_bidder_write_behind_flush_seconds", "Latency of one write-behind batch flush")
+RETRIES = Counter("ad_bidder_write_behind_retries", "Write-behind batch writes retried after a connection failure")
+DROPPED_RECORDS = Counter("ad_bidder_write_behind_dropped_records", "Records dropped by the write-behind pipeline",
+                          ["reason"])
+
+_DUPLICATE_KEY = 11000
+
+
+class BackpressurePolicy(str, Enum):
+    WRITE_THROUGH = "write_through"
+    DROP_NEWEST = "drop_newest"
+    DROP_OLDEST = "drop_oldest"
+
+
+_queue: Deque[Tuple[str, Any]] = deque()
+_lock = threading.Lock()
+# held for a whole flush, so a batch never overtakes an earlier one still being written
+_flush_lock = threading.Lock()
+_flush_task: asyncio.Task | None = None
+# parsed when write-behind starts, so an invalid value does not break the bidder with write-behind disabled
+_policy = BackpressurePolicy.WRITE_THROUGH
+
+
+def offer(collection_name: str, requests: List[Any], follow_up: bool = False) -> bool:
+    """
+    Queues pymongo write requests for the collection. Returns False if the queue is full and the caller has to
+    write the records itself (write_through policy). Follow-up writes to records that may still be queued are never
+    written through, they are queued past the queue size so that they cannot overtake the insert of their record.
+    """
+    with _lock:
+        free = config.WRITE_BEHIND_QUEUE_SIZE - len(_queue)
+        if len(requests) > free:
+            if _policy == BackpressurePolicy.WRITE_THROUGH:
+                if not follow_up:
+                    return False
+                _queue.extend((collection_name, request) for request in requests)
+                QUEUE_DEPTH.set(len(_queue))
+                return True
+            if _policy == BackpressurePolicy.DROP_NEWEST:
+                DROPPED_RECORDS.labels("queue_full").inc(len(requests))
+                return True
+
+        _queue.extend((collection_name, request) for request in requests)
+        dropped = 0
+        while len(_queue) > config.WRITE_BEHIND_QUEUE_SIZE:
+            _queue.popleft()
+            dropped += 1
+        if dropped:
+            DROPPED_RECORDS.labels("queue_full").inc(dropped)
+        QUEUE_DEPTH.set(len(_queue))
+    return True
+
+
+def flush() -> int:
+    """
+    Writes one batch of queued records, one ordered bulk_write per collection so that a notice update is never
+    applied before the insert of the same document.
+    """
+    with _flush_lock:
+        with _lock:
+            batch = [_queue.popleft() for _ in range(min(len(_queue), config.WRITE_BEHIND_BATCH_SIZE))]
+            QUEUE_DEPTH.set(len(_queue))
+        if not batch:
+            return 0
+
+        collection_requests = defaultdict(list)
+        for collection_name, request in batch:
+            collection_requests[collection_name].append(request)
+
+        with FLUSH_LATENCY.time():
+            for collection_name, requests in collection_requests.items():
+                _bulk_write(collection_name, requests)
+        return len(batch)
+
+
+def flush_all():
+    while flush() > 0:
+        pass
+
+
+def start_write_behind():
+    global _flush_task, _policy
+    _policy = BackpressurePolicy(config.WRITE_BEHIND_FULL_POLICY)
+    _flush_task = asyncio.create_task(_flush_loop())
+
+
+async def shutdown_write_behind():
+    if _flush_task is not None:
+        _flush_task.cancel()
+        await asyncio.gather(_flush_task, return_exceptions=True)
+    # cancelling does not stop a flush already running in its thread, the final drain waits for it on _flush_lock
+    await asyncio.to_thread(flush_all)
+
+
+def _bulk_write(collection_name: str, requests: List[Any]):
+    retries = 0
+    while requests:
+        try:
+            db.get_collection(collection_name).bulk_write(requests, ordered=True)
+            return
+        except ConnectionFailure as e:
+            # a retried batch may repeat a prefix that was written before the failure, repeated inserts fail with a
+            # duplicate key and are skipped without counting them as dropped, repeated updates set the same fields
+            if retries >= config.WRITE_BEHIND_MAX_RETRIES:
+                log.error(f"Write-behind batch of {len(requests)} records for {collection_name} failed: {e}")
+                DROPPED_RECORDS.labels("write_error").inc(len(requests))
+                return
+            backoff = config.WRITE_BEHIND_RETRY_BACKOFF_S * 2 ** retries
+            log.warning(f"Write-behind batch for {collection_name} failed, retrying in {backoff} s: {e}")
+            RETRIES.inc()
+            retries += 1
+            time.sleep(backoff)
+        except BulkWriteError as e:
+            write_error = e.details["writeErrors"][0]
+            if not (retries and write_error["code"] == _DUPLICATE_KEY):
+                log.error(f"Write-behind record for {collection_name} failed: {write_error['errmsg']}")
+                DROPPED_RECORDS.labels("write_error").inc()
+            requests = requests[write_error["index"] + 1:]
+        except PyMongoError as e:
+            log.error(f"Write-behind batch of {len(requests)} records for {collection_name} failed: {e}")
+            DROPPED_RECORDS.labels("write_error").inc(len(requests))
+            return
+
+
+async def _flush_loop():
+    while True:
+        await asyncio.sleep(config.WRITE_BEHIND_FLUSH_INTERVAL_S)
+        try:
+            while await asyncio.to_thread(flush) == config.WRITE_BEHIND_BATCH_SIZE:
+                pass
+        except Exception as e:
+            log.error(f"Write-behind flush failed: {e}")
@@ -3,9 +3,14 @@ from prometheus_fastapi_instrumentator import Instrumentator
 
 from ad_bidder import config
 from ad_bidder.bid.controller import router as bid_router
+from ad_bidder.campaign.index import init_campaign_index, start_campaign_index_refresh, shutdown_campaign_index
+from ad_bidder.campaign.pacing import check_pacing_config, start_pacing_reconciliation, shutdown_pacing
 from ad_bidder.constant import AD_BIDDER_BID_ROOT, AD_BIDDER_API_ROOT
-from ad_bidder.db.config import init_db_client, shutdown_db_client
+from ad_bidder.creative.cache import init_creative_cache, start_creative_cache_refresh, shutdown_creative_cache
+from ad_bidder.db.config import init_db_client, init_async_db_client, shutdown_db_client
+from ad_bidder.db.write_behind import start_write_behind, shutdown_write_behind
 from ad_bidder.log import configure_logging
+from ad_bidder.pricing.engine import init_pricing_engine
 
 if config.DEBUG:
     import pydevd_pycharm
@@ -20,11 +25,31 @@ instrumentator = Instrumentator().instrument(app)
 
 
 @app.on_event("startup")
-def startup():
+async def startup():
+    check_pacing_config()
     init_db_client()
+    init_pricing_engine()
+    if config.BID_PATH_ASYNC:
+        await init_async_db_client()
+    if config.CREATIVE_CACHE_ENABLED:
+        init_creative_cache()
+        start_creative_cache_refresh()
+    if config.CAMPAIGN_TARGETING_ENABLED:
+        init_campaign_index()
+        start_campaign_index_refresh()
+    if config.PACING_ENABLED:
+        start_pacing_reconciliation()
+    if config.WRITE_BEHIND_ENABLED:
+        start_write_behind()
     instrumentator.expose(app)
 
 
 @app.on_event("shutdown")
-def shutdown():
+async def shutdown():
+    shutdown_creative_cache()
+    shutdown_campaign_index()
+    if config.PACING_ENABLED:
+        await shutdown_pacing()
+    if config.WRITE_BEHIND_ENABLED:
+        await shutdown_write_behind()
     shutdown_db_client()
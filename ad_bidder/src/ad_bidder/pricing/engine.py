@@ -0,0 +1,175 @@
+import datetime
+import json
+import logging as log
+import os
+from operator import attrgetter
+from abc import ABC, abstractmethod
+from typing import List
+
+import numpy as np
+
+from ad_bidder import config
+from ad_bidder_common.model.openrtb.request import BidRequest, Impression, Device, User
+
+FEATURES = (
+    "banner_w",
+    "banner_h",
+    "banner_area",
+    "bidfloor",
+    "instl",
+    "secure",
+    "device_type",
+    "device_js",
+    "device_connection_type",
+    "device_lmt",
+    "device_dnt",
+    "user_age",
+    "user_gender_m",
+    "user_gender_f",
+)
+"""
+Columns of the feature matrix, in order. Model files reference weights by these names.
+"""
+
+# imp features come first, the request features from device_type on are the same for every imp
+_IMP_FEATURE_COUNT = FEATURES.index("device_type")
+_BANNER_W, _BANNER_H, _BANNER_AREA = FEATURES.index("banner_w"), FEATURES.index("banner_h"), FEATURES.index("banner_area")
+_get_banner = attrgetter("banner")
+_BANNER_COLUMNS = ((_BANNER_W, attrgetter("w")), (_BANNER_H, attrgetter("h")))
+_IMP_COLUMNS = tuple((FEATURES.index(attribute), attrgetter(attribute)) for attribute in ("bidfloor", "instl", "secure"))
+
+_DEFAULT_MODEL_PATH = os.path.join(os.path.dirname(__file__), "default_model.json")
+
+
+class PricingEngine(ABC):
+    @abstractmethod
+    def price(self, imps: List[Impression], bid_request: BidRequest) -> np.ndarray:
+        """
+        Returns bid prices (CPM) for the impressions, in the same order.
+        """
+        pass
+
+    @abstractmethod
+    def name(self) -> str:
+        pass
+
+
+class RandomPricingEngine(PricingEngine):
+    def __init__(self, max_price: float = 10.0, seed: int | None = None):
+        self._max_price = max_price
+        self._rng = np.random.default_rng(seed)
+
+    def price(self, imps: List[Impression], bid_request: BidRequest) -> np.ndarray:
+        return np.round(self._rng.random(len(imps)) * self._max_price, 2)
+
+    def name(self) -> str:
+        return "random"
+
+
+class LinearPricingEngine(PricingEngine):
+    def __init__(self, weights: np.ndarray, bias: float):
+        self._weights = weights
+        self._bias = bias
+
+    def price(self, imps: List[Impression], bid_request: BidRequest) -> np.ndarray:
+        scores = build_feature_matrix(imps, bid_request) @ self._weights + self._bias
+        return np.round(np.maximum(scores, 0.0), 2)
+
+    def name(self) -> str:
+        return "linear"
+
+
+class LogisticPricingEngine(PricingEngine):
+    """
+    Scores win probability with a logistic model and scales it to the maximum price.
+    """
+
+    def __init__(self, weights: np.ndarray, bias: float, max_price: float):
+        self._weights = weights
+        self._bias = bias
+        self._max_price = max_price
+
+    def price(self, imps: List[Impression], bid_request: BidRequest) -> np.ndarray:
+        scores = build_feature_matrix(imps, bid_request) @ self._weights + self._bias
+        return np.round(self._max_price / (1.0 + np.exp(-scores)), 2)
+
+    def name(self) -> str:
+        return "logistic"
+
+
+def build_feature_matrix(imps: List[Impression], bid_request: BidRequest) -> np.ndarray:
+    """
+    Returns the (imps, FEATURES) matrix. Reading the imp attributes is one pass per column and grows linearly with the
+    imp count, at about the rate of the legacy per-imp loop, only the scoring on top of it is a single product.
+    """
+    imp_n = len(imps)
+    # filled feature by feature, the matrix is the transposed view
+    features = np.empty((len(FEATURES), imp_n), dtype=np.float64)
+    banners = list(map(_get_banner, imps))
+    # whole columns are read with C-level getters, missing values come in as nan and count as 0
+    for feature, get_attribute in _BANNER_COLUMNS:
+        features[feature] = np.fromiter(map(get_attribute, banners), dtype=np.float64, count=imp_n)
+    for feature, get_attribute in _IMP_COLUMNS:
+        features[feature] = np.fromiter(map(get_attribute, imps), dtype=np.float64, count=imp_n)
+    imp_features = features[:_IMP_FEATURE_COUNT]
+    np.copyto(imp_features, 0.0, where=np.isnan(imp_features))
+    np.multiply(features[_BANNER_W], features[_BANNER_H], out=features[_BANNER_AREA])
+    features[_BANNER_AREA] /= 10_000
+    features[_IMP_FEATURE_COUNT:] = _request_features(bid_request)[:, np.newaxis]
+    return features.T
+
+
+def _request_features(bid_request: BidRequest) -> np.ndarray:
+    device = bid_request.device or Device()
+    user = bid_request.user or User()
+    return np.array((
+        device.devicetype or 0,
+        device.js or 0,
+        device.connectiontype or 0,
+        device.lmt or 0,
+        device.dnt or 0,
+        datetime.date.today().year - user.yob if user.yob else 0,
+        user.gender == "M",
+        user.gender == "F",
+    ), dtype=np.float64)
+
+
+def load_pricing_engine(path: str) -> PricingEngine:
+    """
+    Loads a model file of the form {"type": "linear" | "logistic", "bias": float, "weights": {feature: float},
+    "max_price": float}. Features missing from the file get a zero weight.
+    """
+    with open(path, "r") as model_file:
+        model = json.load(model_file)
+
+    unknown_features = set(model["weights"]) - set(FEATURES)
+    if unknown_features:
+        raise Exception(f"Unknown pricing features in {path}: {unknown_features}")
+    weights = np.array([model["weights"].get(feature, 0.0) for feature in FEATURES], dtype=np.float64)
+    bias = float(model.get("bias", 0.0))
+
+    model_type = model["type"]
+    if model_type == "linear":
+        return LinearPricingEngine(weights, bias)
+    elif model_type == "logistic":
+        return LogisticPricingEngine(weights, bias, float(model.get("max_price", 10.0)))
+    else:
+        raise Exception(f"Unknown pricing model type={model_type} in {path}")
+
+
+_pricing_engine: PricingEngine = RandomPricingEngine()
+
+
+def init_pricing_engine():
+    global _pricing_engine
+    if config.PRICING_ENGINE == "random":
+        _pricing_engine = RandomPricingEngine()
+    elif config.PRICING_ENGINE == "model":
+        _pricing_engine = load_pricing_engine(config.PRICING_MODEL_PATH or _DEFAULT_MODEL_PATH)
+    else:
+        raise Exception(f"Unknown pricing engine={config.PRICING_ENGINE}")
+    log.debug(f"Pricing engine: {_pricing_engine.name()}")
+
+
+def get_pricing_engine() -> PricingEngine:
+    return _pricing_engine
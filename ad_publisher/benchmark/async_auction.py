@@ -0,0 +1,123 @@
+"""
+Auctions per second of one worker on the sync path (run_auction in the threadpool, blocking pymongo) against the async
+path (run_auction_async on the event loop, motor), with simulated Mongo and bidder latency. The sync path is capped by
+the threadpool size, the async one is not.
+"""
+import asyncio
+import datetime
+import json
+import os
+import time
+
+from util import InsertResult
+
+# overload slows the bidders down artificially, breakers would skew the comparison
+os.environ["BIDDER_BREAKER_ENABLED"] = "False"
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import anyio
+from anyio import to_thread
+from bson import ObjectId
+
+import ad_publisher.db.config as db
+from ad_bidder_common.model.openrtb.request import Impression, Banner, Device, User
+from ad_bidder_common.model.openrtb.response import Bid, BidResponse, SeatBid
+from ad_publisher import ad_bidder_client
+from ad_publisher.ad.model import AdRequest, AdBidder
+from ad_publisher.auction import bidder_registry, notice_dispatcher
+from ad_publisher.auction import service as auction_service
+
+MONGO_LATENCY_S = 0.001
+BIDDER_LATENCY_S = 0.020
+BIDDER_N = 3
+IMP_N = 2
+THREADPOOL_SIZE = 40
+CONCURRENCIES = (10, 40, 200, 1000)
+AUCTION_N = 2000
+
+
+class SleepingCollection:
+    def insert_one(self, doc: dict, **kwargs) -> InsertResult:
+        time.sleep(MONGO_LATENCY_S)
+        return InsertResult([ObjectId()])
+
+    def insert_many(self, docs: list, **kwargs) -> InsertResult:
+        time.sleep(MONGO_LATENCY_S)
+        return InsertResult([doc.get("_id", ObjectId()) for doc in docs])
+
+    def update_one(self, *args, **kwargs) -> None:
+        time.sleep(MONGO_LATENCY_S)
+
+
+class AsyncSleepingCollection:
+    async def insert_one(self, doc: dict, **kwargs) -> InsertResult:
+        await asyncio.sleep(MONGO_LATENCY_S)
+        return InsertResult([ObjectId()])
+
+    async def insert_many(self, docs: list, **kwargs) -> InsertResult:
+        await asyncio.sleep(MONGO_LATENCY_S)
+        return InsertResult([doc.get("_id", ObjectId()) for doc in docs])
+
+    async def update_one(self, *args, **kwargs) -> None:
+        await asyncio.sleep(MONGO_LATENCY_S)
+
+
+async def _post_bid_request(bidder: AdBidder, bid_request_body: bytes) -> BidResponse:
+    await asyncio.sleep(BIDDER_LATENCY_S)
+    imp_ids = [imp["id"] for imp in json.loads(bid_request_body)["imp"]]
+    bids = [Bid(id=str(ObjectId()), impid=impid, price=2.0 + i) for i, impid in enumerate(imp_ids)]
+    return BidResponse(id=bidder.id, seatbid=[SeatBid(bid=bids)])
+
+
+async def _post_notices(bidder: AdBidder, notices: list) -> dict:
+    await asyncio.sleep(BIDDER_LATENCY_S / 4)
+    return {bid.id: "<html/>" for _, bid in notices}
+
+
+def _ad_request() -> AdRequest:
+    imps = [Impression(id=str(i), banner=Banner(id=str(i), w=300, h=250)) for i in range(IMP_N)]
+    return AdRequest(timestamp=datetime.datetime.now(), device=Device(devicetype=2), user=User(), imps=imps)
+
+
+def _patch():
+    sync_collection, async_collection = SleepingCollection(), AsyncSleepingCollection()
+    for name in ("auction", "bid_request", "imp"):
+        setattr(db, f"get_{name}_collection", lambda: sync_collection)
+        setattr(db, f"get_async_{name}_collection", lambda: async_collection)
+    bidder_registry._bidders = tuple(AdBidder(id=str(i), bid_request_url=f"http://bidder-{i}/bids/request")
+                                     for i in range(BIDDER_N))
+    ad_bidder_client.post_bid_request = _post_bid_request
+    ad_bidder_client.post_notices = _post_notices
+    notice_dispatcher.submit = lambda bidder, bids: None
+
+
+async def _run(concurrency: int, run_one) -> float:
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with slots:
+            await run_one()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(AUCTION_N)))
+    return AUCTION_N / (time.perf_counter() - start)
+
+
+async def _main():
+    _patch()
+    limiter = anyio.CapacityLimiter(THREADPOOL_SIZE)
+    # each ad request is rebuilt, run_auction assigns ids to its impressions
+    sync_run = lambda: to_thread.run_sync(auction_service.run_auction, _ad_request(), limiter=limiter)
+    async_run = lambda: auction_service.run_auction_async(_ad_request())
+
+    print(f"mongo {MONGO_LATENCY_S * 1000:.0f} ms, bidders {BIDDER_LATENCY_S * 1000:.0f} ms, {BIDDER_N} bidders, "
+          f"{IMP_N} imps, threadpool {THREADPOOL_SIZE}")
+    print(f"{'concurrency':>12} {'sync auctions/s':>16} {'async auctions/s':>17}")
+    for concurrency in CONCURRENCIES:
+        sync_aps = await _run(concurrency, sync_run)
+        async_aps = await _run(concurrency, async_run)
+        print(f"{concurrency:>12} {sync_aps:>16.0f} {async_aps:>17.0f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
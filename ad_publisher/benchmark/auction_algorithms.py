@@ -0,0 +1,35 @@
+"""
+calc_winner cost of every registered auction algorithm at realistic request shapes: a handful of impressions and up to
+a few dozen bidders bidding on each.
+"""
+import random
+
+from util import time_it
+
+from ad_bidder_common.model.openrtb.response import Bid
+from ad_publisher.auction.algorithm import AUCTION_ALGORITHMS
+
+# (imps, bidders)
+REQUEST_SHAPES = ((1, 5), (1, 20), (4, 10), (4, 50), (10, 20), (10, 100))
+RESERVED_PRICE = 1.0
+
+
+def _bids(imp_n: int, bidder_n: int) -> tuple[list[Bid], list[str]]:
+    imp_ids = [str(i) for i in range(imp_n)]
+    bids = [Bid(id=f"{bidder}-{impid}", impid=impid, price=round(random.random() * 10, 2))
+            for bidder in range(bidder_n) for impid in imp_ids]
+    return bids, imp_ids
+
+
+def main():
+    random.seed(42)
+    print(f"{'imps':>5} {'bidders':>8} {'bids':>6} " + " ".join(f"{t.value + ' us':>16}" for t in AUCTION_ALGORITHMS))
+    for imp_n, bidder_n in REQUEST_SHAPES:
+        bids, imp_ids = _bids(imp_n, bidder_n)
+        timings = [time_it(lambda: algorithm().calc_winner(bids, RESERVED_PRICE, imp_ids), repeat=1000)
+                   for algorithm in AUCTION_ALGORITHMS.values()]
+        print(f"{imp_n:>5} {bidder_n:>8} {len(bids):>6} " + " ".join(f"{us:>16.1f}" for us in timings))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Clearing cost per batch as the bid count grows: a per-bid Python reference (group in dicts, track the best two bids
+per impression) against the columnar NumPy auction kernel. Both must produce identical winners and clearing prices.
+"""
+import numpy as np
+from util import time_it
+
+from ad_publisher.auction.kernel import clear_auctions
+
+BID_COUNTS = (1_000, 10_000, 100_000, 1_000_000)
+BIDS_PER_IMP = 8
+RESERVED_PRICE = 1.0
+
+
+def _reference(prices: list, imp_idx: list, imp_n: int, reserved_price: float):
+    best = {}
+    for i, (price, imp) in enumerate(zip(prices, imp_idx)):
+        if price < reserved_price:
+            continue
+        if imp not in best:
+            best[imp] = [i, price, reserved_price]
+        elif price > best[imp][1]:
+            best[imp] = [i, price, best[imp][1]]
+        else:
+            best[imp][2] = max(best[imp][2], price)
+
+    winner = [-1] * imp_n
+    first_price = [float("nan")] * imp_n
+    second_price = [float("nan")] * imp_n
+    for imp, (i, price, runner_up_price) in best.items():
+        winner[imp], first_price[imp], second_price[imp] = i, price, runner_up_price
+    return winner, first_price, second_price
+
+
+def _batch(bid_n: int, rng: np.random.Generator):
+    imp_n = max(1, bid_n // BIDS_PER_IMP)
+    # prices in cents so that ties occur
+    prices = np.round(rng.random(bid_n) * 10, 2)
+    imp_idx = rng.integers(0, imp_n, bid_n)
+    return prices, imp_idx, imp_n
+
+
+def main():
+    rng = np.random.default_rng(42)
+    print(f"{'bids':>9} {'reference ms':>13} {'kernel ms':>10} {'speedup':>8}")
+    for bid_n in BID_COUNTS:
+        prices, imp_idx, imp_n = _batch(bid_n, rng)
+        price_list, imp_list = prices.tolist(), imp_idx.tolist()
+        repeat = max(1, 100_000 // bid_n)
+
+        expected = _reference(price_list, imp_list, imp_n, RESERVED_PRICE)
+        clearing = clear_auctions(prices, imp_idx, imp_n, RESERVED_PRICE)
+        assert clearing.winner.tolist() == expected[0]
+        assert np.array_equal(clearing.first_price, np.array(expected[1]), equal_nan=True)
+        assert np.array_equal(clearing.second_price, np.array(expected[2]), equal_nan=True)
+
+        reference_ms = time_it(lambda: _reference(price_list, imp_list, imp_n, RESERVED_PRICE), repeat) / 1000
+        kernel_ms = time_it(lambda: clear_auctions(prices, imp_idx, imp_n, RESERVED_PRICE), repeat) / 1000
+        print(f"{bid_n:>9} {reference_ms:>13.2f} {kernel_ms:>10.2f} {reference_ms / kernel_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
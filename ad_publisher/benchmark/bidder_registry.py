@@ -0,0 +1,42 @@
+"""
+Bidder lookup on the auction hot path: the legacy find() + validate_mongo_many per auction against the in-memory
+bidder registry snapshot.
+"""
+from bson import ObjectId
+from util import CountingCollection, time_it
+
+import ad_publisher.db.config as db
+from ad_publisher.ad.model import AdBidder
+from ad_publisher.auction import bidder_registry
+from ad_publisher.auction import service as auction_service
+
+AUCTION_N = 1000
+BIDDER_N = 10
+
+
+def _legacy_get_bidders() -> list[AdBidder]:
+    return AdBidder.validate_mongo_many(list(db.get_bidder_collection().find()))
+
+
+def main():
+    bidder_collection = CountingCollection([{"_id": ObjectId(), "bid_request_url": "http://ad_bidder/api/v1/bids/request"}
+                                            for _ in range(BIDDER_N)])
+    db.get_bidder_collection = lambda: bidder_collection
+
+    legacy_us = time_it(_legacy_get_bidders, repeat=AUCTION_N)
+    legacy_round_trips = bidder_collection.round_trips
+
+    bidder_collection.round_trips = 0
+    bidder_registry.init_bidder_registry()
+    startup_round_trips = bidder_collection.round_trips
+    registry_us = time_it(auction_service._get_bidders, repeat=AUCTION_N)
+    registry_round_trips = bidder_collection.round_trips - startup_round_trips
+
+    print(f"{AUCTION_N} auctions, {BIDDER_N} bidders")
+    print(f"{'':>10} {'us/auction':>11} {'mongo reads':>12}")
+    print(f"{'legacy':>10} {legacy_us:>11.1f} {legacy_round_trips:>12}")
+    print(f"{'registry':>10} {registry_us:>11.1f} {registry_round_trips:>12} (+{startup_round_trips} at startup)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Mongo round trips per ad request in _insert_imps_into_db: the legacy insert_one per impression against a single
+unordered insert_many with client-side ObjectIds.
+"""
+from util import CountingCollection, time_it
+
+import ad_publisher.db.config as db
+from ad_bidder_common.model.openrtb.request import Impression, Banner
+from ad_publisher.auction import service as auction_service
+
+IMP_COUNTS = (1, 2, 5, 10, 20, 50)
+REPEAT = 100
+
+
+def _legacy_insert_imps_into_db(imps: list[Impression]):
+    for imp in imps:
+        insert_result = db.get_imp_collection().insert_one(imp.dump_mongo())
+        imp.id = str(insert_result.inserted_id)
+
+
+def _imps(imp_n: int) -> list[Impression]:
+    return [Impression(id=str(i), banner=Banner(id=str(i), w=300, h=250)) for i in range(imp_n)]
+
+
+def main():
+    print(f"{'imps':>6} {'legacy round trips':>20} {'bulk round trips':>18} {'legacy us':>10} {'bulk us':>8}")
+    for imp_n in IMP_COUNTS:
+        legacy = CountingCollection()
+        db.get_imp_collection = lambda: legacy
+        legacy_us = time_it(lambda: _legacy_insert_imps_into_db(_imps(imp_n)), REPEAT)
+
+        bulk = CountingCollection()
+        db.get_imp_collection = lambda: bulk
+        bulk_us = time_it(lambda: auction_service._insert_imps_into_db(_imps(imp_n)), REPEAT)
+
+        print(f"{imp_n:>6} {legacy.round_trips // REPEAT:>20} {bulk.round_trips // REPEAT:>18} {legacy_us:>10.1f} "
+              f"{bulk_us:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,29 @@
 import logging as log
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 from starlette import status
 from starlette.responses import Response
 
 import ad_publisher.auction.service as auction_service
+from ad_bidder_common.model.openrtb import codec
+from ad_bidder_common.model.openrtb.codec import CodecResponse
+from ad_publisher import config
 from ad_publisher.ad.model import AdRequest, AdResponse
 
 router = APIRouter()
 
 
-@router.post("/request")
-def post_ad(ad_request: AdRequest) -> AdResponse:
-    imp_html = auction_service.run_auction(ad_request)
-    return AdResponse(imp_html=imp_html)
+# ad request and response bodies go through the openrtb codec instead of FastAPI's validation and serialization
+if config.AUCTION_PATH_ASYNC:
+    @router.post("/request", response_model=AdResponse)
+    async def post_ad(ad_request: AdRequest = Depends(codec.body_of(AdRequest))) -> CodecResponse:
+        imp_html = await auction_service.run_auction_async(ad_request)
+        return CodecResponse(AdResponse(imp_html=imp_html))
+else:
+    @router.post("/request", response_model=AdResponse)
+    def post_ad(ad_request: AdRequest = Depends(codec.body_of(AdRequest))) -> CodecResponse:
+        imp_html = auction_service.run_auction(ad_request)
+        return CodecResponse(AdResponse(imp_html=imp_html))
 
 
 @router.post("/generate_log")
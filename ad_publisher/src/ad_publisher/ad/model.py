@@ -1,10 +1,11 @@
 import datetime
-from typing import List, Dict
+from typing import List, Dict, Optional
 
 from pydantic import BaseModel
 
 from ad_bidder_common.model.openrtb.request import Device, User, Impression
 from ad_bidder_common.model.openrtb.util import MongoDbMixin
+from ad_publisher.auction.algorithm import AuctionAlgorithmType
 
 
 class AdRequest(BaseModel, MongoDbMixin):
@@ -12,6 +13,10 @@ class AdRequest(BaseModel, MongoDbMixin):
     device: Device
     user: User
     imps: List[Impression]
+    auction_algorithm: Optional[AuctionAlgorithmType] = None
+    """
+    Overrides the configured AUCTION_ALGORITHM for this request.
+    """
 
 
 class AdResponse(BaseModel, MongoDbMixin):
@@ -21,6 +26,11 @@ class AdResponse(BaseModel, MongoDbMixin):
 class AdBidder(BaseModel, MongoDbMixin):
     id: str
     bid_request_url: str
+    notices_url: Optional[str] = None
+    """
+    Batch win/loss notice endpoint. Bidders registered without one get the ad_bidder notices path on the host of
+    their bid_request_url.
+    """
 
 
 class Ad(BaseModel, MongoDbMixin):
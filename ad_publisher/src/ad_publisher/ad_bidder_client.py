@@ -1,30 +1,92 @@
+import asyncio
 import logging as log
-from typing import Optional
+from contextlib import asynccontextmanager
+from typing import List, Tuple, Dict
 
 import httpx
+from prometheus_client import Gauge
 from starlette import status
 
-from ad_bidder_common.model.openrtb.request import BidRequest
+from ad_bidder_common.model.openrtb import codec
 from ad_bidder_common.model.openrtb.response import BidResponse, Bid
+from ad_publisher import config
 from ad_publisher.ad.model import AdBidder
 from ad_publisher.auction.model import BidStatus
-from ad_publisher.constants import AD_BIDDER_URL_ROOT
-
-
-def post_bid_request(bidder: AdBidder, bid_request: BidRequest) -> BidResponse:
-    body = bid_request.model_dump(mode="json")
-    log.debug("Sending bid request: " + str(body))
-    with httpx.Client(timeout=None) as client:
-        response = client.post(bidder.bid_request_url, json=body)
-        if response.status_code != status.HTTP_200_OK:
-            raise Exception(f"Couldn't get ad response. Received: {str(response)}")
-        return BidResponse.model_validate_json(response.content)
-
-
-def post_notice(bid_status: BidStatus, bid: Bid) -> Optional[str]:
-    with httpx.Client(timeout=None) as client:
-        notice_url = AD_BIDDER_URL_ROOT + bid.nurl
-        response = client.post(url=notice_url, params={"status": bid_status.value, "imp_id": bid.impid})
-        if response.status_code != status.HTTP_200_OK:
-            raise Exception(f"Couldn't post notice. Received: {response}")
-        return response.text
+from ad_publisher.constants import AD_BIDDER_BIDS_NOTICES_PATH
+
+POOL_IN_USE = Gauge("ad_publisher_bidder_pool_in_use", "Connections to a bidder currently in use", ["bidder"])
+POOL_WAITING = Gauge("ad_publisher_bidder_pool_waiting", "Requests waiting for a free connection to a bidder",
+                     ["bidder"])
+POOL_LIMIT = Gauge("ad_publisher_bidder_pool_limit", "Connection limit per bidder")
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+_client: httpx.AsyncClient | None = None
+_bidder_slots: Dict[str, asyncio.Semaphore] = {}
+
+
+def init_http_client():
+    global _client
+    limits = httpx.Limits(max_connections=config.BIDDER_POOL_MAX_CONNECTIONS,
+                          max_keepalive_connections=config.BIDDER_MAX_KEEPALIVE_CONNECTIONS,
+                          keepalive_expiry=config.BIDDER_KEEPALIVE_EXPIRY_S)
+    timeout = httpx.Timeout(connect=config.BIDDER_CONNECT_TIMEOUT_S, read=config.BIDDER_READ_TIMEOUT_S,
+                            write=config.BIDDER_WRITE_TIMEOUT_S, pool=config.BIDDER_POOL_TIMEOUT_S)
+    _client = httpx.AsyncClient(limits=limits, timeout=timeout, http2=config.BIDDER_HTTP2)
+    POOL_LIMIT.set(config.BIDDER_MAX_CONNECTIONS)
+    log.debug(f"Bidder http client created, http2={config.BIDDER_HTTP2}")
+
+
+async def shutdown_http_client():
+    await _client.aclose()
+
+
+async def post_bid_request(bidder: AdBidder, bid_request_body: bytes) -> BidResponse:
+    """
+    Sends an already encoded bid request, so one encoding can be shared by all bidders of an auction.
+    """
+    log.debug(f"Sending bid request to bidder id={bidder.id}")
+    async with _bidder_slot(bidder):
+        response = await _client.post(bidder.bid_request_url, content=bid_request_body, headers=_JSON_HEADERS)
+    if response.status_code != status.HTTP_200_OK:
+        raise Exception(f"Couldn't get ad response. Received: {str(response)}")
+    return codec.decode(response.content, BidResponse)
+
+
+async def post_notices(bidder: AdBidder, notices: List[Tuple[BidStatus, Bid]]) -> Dict[str, str]:
+    body = {"notices": [{"bid_id": bid.id, "imp_id": bid.impid, "status": bid_status.value}
+                        for bid_status, bid in notices]}
+    notices_url = bidder.notices_url or httpx.URL(bidder.bid_request_url).copy_with(path=AD_BIDDER_BIDS_NOTICES_PATH,
+                                                                                   query=None)
+    async with _bidder_slot(bidder):
+        response = await _client.post(url=notices_url, json=body)
+    if response.status_code != status.HTTP_200_OK:
+        raise Exception(f"Couldn't post notices. Received: {response}")
+    result = response.json()
+    if result["errors"]:
+        log.warning(f"Bidder rejected notices: {result['errors']}")
+    return result["html"]
+
+
+@asynccontextmanager
+async def _bidder_slot(bidder: AdBidder):
+    """
+    Bounds the connections to one bidder within the shared pool. Bidders may share a host, so they are told apart by
+    id.
+    """
+    slot = _bidder_slots.get(bidder.id)
+    if slot is None:
+        slot = _bidder_slots[bidder.id] = asyncio.Semaphore(config.BIDDER_MAX_CONNECTIONS)
+
+    POOL_WAITING.labels(bidder.id).inc()
+    try:
+        await slot.acquire()
+    finally:
+        POOL_WAITING.labels(bidder.id).dec()
+
+    POOL_IN_USE.labels(bidder.id).inc()
+    try:
+        yield
+    finally:
+        POOL_IN_USE.labels(bidder.id).dec()
+        slot.release()
@@ -1,15 +1,41 @@
 import logging as log
+import math
 from abc import abstractmethod, ABC
-from typing import Dict
+from enum import Enum
+from typing import Dict, Type
 
+import numpy as np
 from typing_extensions import List
 
 from ad_bidder_common.model.openrtb.response import Bid
+from ad_publisher import config
+from ad_publisher.auction.kernel import Clearing, clear_auctions, rank_slots, gsp_prices, vcg_prices
+
+
+class AuctionAlgorithmType(str, Enum):
+    FIRST_PRICE = "first_price"
+    SECOND_PRICE = "second_price"
+    GSP = "gsp"
+    VCG = "vcg"
+
+
+ReservedPrice = float | Dict[str, float]
+"""
+A reserved price shared by all impressions, or one per impression id.
+"""
 
 
 class AuctionAlgorithm(ABC):
+    type: AuctionAlgorithmType
+
     @abstractmethod
-    def calc_winner(self, bids: List[Bid], reserved_price: float) -> Dict[str, Bid]:
+    def calc_winner(self, bids: List[Bid], reserved_price: ReservedPrice, imp_ids: List[str] | None = None,
+                    bidder_ids: List[str] | None = None) -> Dict[str, Bid]:
+        """
+        Returns the winning bid per impression id. imp_ids are the impressions of the request in slot order, best
+        slot first, bids on other impressions don't compete. bidder_ids are the bidders of the bids, in the same order;
+        without them every bid counts as a bidder of its own.
+        """
         pass
 
     @abstractmethod
@@ -17,59 +43,143 @@ class AuctionAlgorithm(ABC):
         pass
 
 
-class DefaultAuctionAlgorithm(AuctionAlgorithm):
-    def calc_winner(self, bids: List[Bid], reserved_price: float) -> Dict[str, Bid]:
+class ColumnarAuctionAlgorithm(AuctionAlgorithm, ABC):
+    """
+    Lays the bids out as price and impression columns and clears all impressions with the auction kernel. Every
+    impression is an auction of its own, a bidder may win several of them.
+    """
+
+    def calc_winner(self, bids: List[Bid], reserved_price: ReservedPrice, imp_ids: List[str] | None = None,
+                    bidder_ids: List[str] | None = None) -> Dict[str, Bid]:
         log.debug("Start calc_winner")
 
-        eligible_bids = list(filter(lambda bid: bid.price >= reserved_price, bids))
-        log.debug(f"Eligible bids count={len(eligible_bids)}")
+        if imp_ids is None:
+            imp_ids = list(dict.fromkeys(bid.impid for bid in bids))
+        imp_index = {impid: i for i, impid in enumerate(imp_ids)}
+        bids = [bid for bid in bids if bid.impid in imp_index]
+        prices = np.fromiter((bid.price for bid in bids), dtype=np.float64, count=len(bids))
+        imp_idx = np.fromiter((imp_index[bid.impid] for bid in bids), dtype=np.int64, count=len(bids))
 
-        impid_bids = {}
-        for bid in eligible_bids:
-            if bid.impid in impid_bids:
-                impid_bids[bid.impid].append(bid)
-            else:
-                impid_bids[bid.impid] = [bid]
+        clearing = clear_auctions(prices, imp_idx, len(imp_ids), _reserved_prices(reserved_price, imp_ids))
 
         winners = {}
-        for impid in impid_bids:
-            log.debug(f"Calculating bid for impid={impid}")
+        for i, winner in enumerate(clearing.winner.tolist()):
+            if winner >= 0:
+                winners[imp_ids[i]] = self._winning_bid(bids[winner], clearing, i)
+                log.debug(f"Winner for impid={imp_ids[i]} is bid with price={winners[imp_ids[i]].price}")
+
+        return winners
+
+    @abstractmethod
+    def _winning_bid(self, bid: Bid, clearing: Clearing, imp: int) -> Bid:
+        pass
 
-            bids_for_impid = impid_bids[impid]
-            log.debug(f"Elibigle bids={list(map(lambda bid: bid.price, eligible_bids))}")
 
-            highest_price_bid = max(bids_for_impid, key=lambda bid: bid.price)
-            winners[impid] = highest_price_bid
-            log.debug(f"Winner for impid={impid} is bid with price={winners[impid].price}")
+class DefaultAuctionAlgorithm(ColumnarAuctionAlgorithm):
+    type = AuctionAlgorithmType.FIRST_PRICE
 
-        return winners
+    def _winning_bid(self, bid: Bid, clearing: Clearing, imp: int) -> Bid:
+        return bid
 
     def name(self) -> str:
         return "First highest"
 
 
-class SecondHighestAuctionAlgorithm(AuctionAlgorithm):
-    def calc_winner(self, bids: List[Bid], reserved_price: float) -> Dict[str, Bid]:
+class SecondHighestAuctionAlgorithm(ColumnarAuctionAlgorithm):
+    """
+    The highest bid wins and pays the second highest price, or the reserved price when it is the only eligible bid.
+    """
+    type = AuctionAlgorithmType.SECOND_PRICE
+
+    def _winning_bid(self, bid: Bid, clearing: Clearing, imp: int) -> Bid:
+        return bid.model_copy(update={"price": float(clearing.second_price[imp])})
+
+    def name(self) -> str:
+        return "Second highest"
+
+
+class MultiSlotAuctionAlgorithm(AuctionAlgorithm, ABC):
+    """
+    Treats the impressions of a request as slots of one page that every bid competes for, regardless of the impression
+    it was placed on. The highest bids take the slots in order and the winner of a slot pays the price computed by
+    the subclass. A winning bid keeps its own impid, it is returned under the impression id of the slot it took.
+    Bids are ranked against the lowest slot floor; a slot stays empty when its winner is below the slot's own floor.
+    A bidder takes one slot at most, only its highest bid competes.
+    """
+
+    def calc_winner(self, bids: List[Bid], reserved_price: ReservedPrice, imp_ids: List[str] | None = None,
+                    bidder_ids: List[str] | None = None) -> Dict[str, Bid]:
         log.debug("Start calc_winner")
 
-        eligible_bids = filter(lambda bid: bid.price >= reserved_price, bids)
-        log.debug(f"Eligible bids count={len(eligible_bids)}")
+        slots = imp_ids if imp_ids is not None else list(dict.fromkeys(bid.impid for bid in bids))
+        if not slots:
+            return {}
+        # bids on impressions that are not in the request don't compete, of the others the highest per bidder does
+        slot_ids = set(slots)
+        bidder_bids = {}
+        for bidder_id, bid in zip(bidder_ids if bidder_ids is not None else range(len(bids)), bids):
+            if bid.impid in slot_ids and (bidder_id not in bidder_bids or bid.price > bidder_bids[bidder_id].price):
+                bidder_bids[bidder_id] = bid
+        bids = list(bidder_bids.values())
+        slot_floors = np.broadcast_to(_reserved_prices(reserved_price, slots), (len(slots),))
+        prices = np.fromiter((bid.price for bid in bids), dtype=np.float64, count=len(bids))
+        winners, ranked_prices = rank_slots(prices, len(slots), float(slot_floors.min()))
+        slot_prices = np.maximum(self._slot_prices(ranked_prices, len(slots)), slot_floors)
+
+        imp_winner_bids = {}
+        for slot, winner in enumerate(winners.tolist()):
+            if bids[winner].price < slot_floors[slot]:
+                continue
+            imp_winner_bids[slots[slot]] = bids[winner].model_copy(update={"price": float(slot_prices[slot])})
+            log.debug(f"Winner for impid={slots[slot]} is bid id={bids[winner].id} with price={slot_prices[slot]}")
+
+        return imp_winner_bids
 
-        impid_bids = {}
-        for bid in eligible_bids:
-            if bid.impid in impid_bids:
-                impid_bids[bid.impid].append(bid)
-            else:
-                impid_bids[bid.impid] = [bid]
+    @abstractmethod
+    def _slot_prices(self, ranked_prices: np.ndarray, slot_n: int) -> np.ndarray:
+        pass
 
-        winners = {}
-        for impid in impid_bids:
-            bids_for_impid = impid_bids[impid]
-            bids_for_impid.sort(key=lambda bid: bid.price)
-            winners[impid] = bids_for_impid[1] if len(bids_for_impid) > 1 else bids_for_impid[0]
-            log.debug(f"Winner for impid={impid} is bid with price={winners[impid].price}")
 
-        return winners
+class GspAuctionAlgorithm(MultiSlotAuctionAlgorithm):
+    type = AuctionAlgorithmType.GSP
+
+    def _slot_prices(self, ranked_prices: np.ndarray, slot_n: int) -> np.ndarray:
+        return gsp_prices(ranked_prices)
 
     def name(self) -> str:
-        return "Second highest"
+        return "Generalized second price"
+
+
+class VcgAuctionAlgorithm(MultiSlotAuctionAlgorithm):
+    """
+    Slot weights decay geometrically with the slot position by AUCTION_SLOT_WEIGHT_DECAY.
+    """
+    type = AuctionAlgorithmType.VCG
+
+    def _slot_prices(self, ranked_prices: np.ndarray, slot_n: int) -> np.ndarray:
+        slot_weights = config.AUCTION_SLOT_WEIGHT_DECAY ** np.arange(slot_n, dtype=np.float64)
+        return vcg_prices(ranked_prices, slot_weights)
+
+    def name(self) -> str:
+        return "VCG"
+
+
+def _reserved_prices(reserved_price: ReservedPrice, imp_ids: List[str]) -> np.ndarray | float:
+    if not isinstance(reserved_price, dict):
+        return reserved_price
+    # bids on impressions without a reserved price, i.e. not in the request, can't win
+    return np.fromiter((reserved_price.get(impid, math.inf) for impid in imp_ids), dtype=np.float64,
+                       count=len(imp_ids))
+
+
+AUCTION_ALGORITHMS: Dict[AuctionAlgorithmType, Type[AuctionAlgorithm]] = {
+    algorithm.type: algorithm for algorithm in (DefaultAuctionAlgorithm, SecondHighestAuctionAlgorithm,
+                                                GspAuctionAlgorithm, VcgAuctionAlgorithm)
+}
+
+
+def get_auction_algorithm(algorithm_type: AuctionAlgorithmType | None = None) -> AuctionAlgorithm:
+    """
+    Creates the algorithm of the given type, or of the configured AUCTION_ALGORITHM when none is given.
+    """
+    return AUCTION_ALGORITHMS[AuctionAlgorithmType(algorithm_type or config.AUCTION_ALGORITHM)]()
@@ -0,0 +1,130 @@
+import logging as log
+import time
+from collections import deque
+from enum import Enum
+from typing import Deque, Dict, Tuple
+
+from prometheus_client import Counter, Gauge
+
+from ad_publisher import config
+
+BREAKER_STATE = Gauge("ad_publisher_bidder_breaker_state", "Circuit breaker state per bidder: 0 closed, "
+                                                           "1 half open, 2 open", ["bidder"])
+BREAKER_SKIPS = Counter("ad_publisher_bidder_breaker_skips", "Auctions that skipped a bidder with an open breaker",
+                        ["bidder"])
+HEDGED_REQUESTS = Counter("ad_publisher_bidder_hedged_requests", "Hedged bid requests sent after a bidder crossed "
+                                                                 "its p95 latency", ["bidder", "outcome"])
+
+
+class BreakerState(int, Enum):
+    CLOSED = 0
+    HALF_OPEN = 1
+    OPEN = 2
+
+
+class BidderHealth:
+    """
+    Rolling window of the latest bid request outcomes of one bidder. The breaker opens when the error rate or the p95
+    latency of the window crosses its threshold, lets a single probe through after the cooldown and closes again when
+    the probe succeeds.
+    """
+
+    def __init__(self, bidder_id: str):
+        self._bidder_id = bidder_id
+        # (succeeded, latency in seconds)
+        self._outcomes: Deque[Tuple[bool, float]] = deque(maxlen=config.BIDDER_HEALTH_WINDOW)
+        self._state = BreakerState.CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+        BREAKER_STATE.labels(bidder_id).set(self._state.value)
+
+    def allow(self) -> bool:
+        if self._state == BreakerState.OPEN and time.monotonic() - self._opened_at >= config.BIDDER_BREAKER_COOLDOWN_S:
+            self._set_state(BreakerState.HALF_OPEN)
+        if self._state == BreakerState.CLOSED:
+            return True
+        if self._state == BreakerState.HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def release_probe(self):
+        """
+        Gives back a probe let through by allow when no request was sent, so that the next auction probes instead.
+        """
+        self._probing = False
+
+    def record(self, succeeded: bool, latency: float):
+        self._outcomes.append((succeeded, latency))
+        if self._state == BreakerState.HALF_OPEN and self._probing:
+            self._probing = False
+            if succeeded:
+                self._outcomes.clear()
+                self._set_state(BreakerState.CLOSED)
+            else:
+                self._open()
+        elif self._state == BreakerState.CLOSED and self._unhealthy():
+            self._open()
+
+    def p95(self) -> float | None:
+        """
+        p95 latency of the successful requests in the window, None until there are enough of them.
+        """
+        latencies = sorted(latency for succeeded, latency in self._outcomes if succeeded)
+        if len(latencies) < config.BIDDER_BREAKER_MIN_SAMPLES:
+            return None
+        return latencies[int(0.95 * (len(latencies) - 1))]
+
+    def _unhealthy(self) -> bool:
+        if len(self._outcomes) < config.BIDDER_BREAKER_MIN_SAMPLES:
+            return False
+        error_rate = sum(not succeeded for succeeded, _ in self._outcomes) / len(self._outcomes)
+        if error_rate >= config.BIDDER_BREAKER_ERROR_RATE:
+            return True
+        p95 = self.p95()
+        return p95 is not None and p95 * 1000 >= config.BIDDER_BREAKER_P95_MS
+
+    def _open(self):
+        self._opened_at = time.monotonic()
+        self._set_state(BreakerState.OPEN)
+
+    def _set_state(self, state: BreakerState):
+        if state != self._state:
+            log.warning(f"Circuit breaker of bidder id={self._bidder_id}: {self._state.name} -> {state.name}")
+        self._state = state
+        BREAKER_STATE.labels(self._bidder_id).set(state.value)
+
+
+# only used from the event loop, so no locking
+_health: Dict[str, BidderHealth] = {}
+
+
+def get_bidder_health(bidder_id: str) -> BidderHealth:
+    health = _health.get(bidder_id)
+    if health is None:
+        health = _health[bidder_id] = BidderHealth(bidder_id)
+    return health
+
+
+def allow(bidder_id: str) -> bool:
+    if not config.BIDDER_BREAKER_ENABLED:
+        return True
+    allowed = get_bidder_health(bidder_id).allow()
+    if not allowed:
+        BREAKER_SKIPS.labels(bidder_id).inc()
+    return allowed
+
+
+def release_probe(bidder_id: str):
+    if config.BIDDER_BREAKER_ENABLED:
+        get_bidder_health(bidder_id).release_probe()
+
+
+def record_success(bidder_id: str, latency: float):
+    if config.BIDDER_BREAKER_ENABLED or config.BIDDER_HEDGING_ENABLED:
+        get_bidder_health(bidder_id).record(True, latency)
+
+
+def record_failure(bidder_id: str, latency: float):
+    if config.BIDDER_BREAKER_ENABLED or config.BIDDER_HEDGING_ENABLED:
+        get_bidder_health(bidder_id).record(False, latency)
@@ -0,0 +1,83 @@
+import asyncio
+import logging as log
+from typing import Tuple
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+import ad_publisher.db.config as db
+from ad_publisher import config
+from ad_publisher.ad.model import AdBidder
+
+_bidders: Tuple[AdBidder, ...] = ()
+_refresh_task: asyncio.Task | None = None
+_change_stream = None
+_stopped = False
+
+
+def init_bidder_registry():
+    refresh_bidders()
+
+
+def refresh_bidders():
+    global _bidders
+    bidders = tuple(AdBidder.validate_mongo_many(list(db.get_bidder_collection().find())))
+    # a new tuple is swapped in, auctions holding the previous snapshot are not affected
+    _bidders = bidders
+    log.debug(f"Bidder registry refreshed: {len(bidders)} bidders")
+
+
+def get_bidders() -> Tuple[AdBidder, ...]:
+    return _bidders
+
+
+def start_bidder_registry_refresh():
+    global _refresh_task
+    if config.BIDDER_REGISTRY_REFRESH == "change_stream":
+        _refresh_task = asyncio.create_task(_watch_loop())
+    elif config.BIDDER_REGISTRY_REFRESH == "ttl":
+        _refresh_task = asyncio.create_task(_ttl_loop())
+    else:
+        raise Exception(f"Unknown bidder registry refresh mode={config.BIDDER_REGISTRY_REFRESH}")
+
+
+def shutdown_bidder_registry():
+    global _stopped
+    _stopped = True
+    if _change_stream is not None:
+        _change_stream.close()
+    if _refresh_task is not None:
+        _refresh_task.cancel()
+
+
+async def _ttl_loop():
+    while True:
+        await asyncio.sleep(config.BIDDER_REGISTRY_TTL_S)
+        try:
+            await asyncio.to_thread(refresh_bidders)
+        except Exception as e:
+            log.error(f"Bidder registry refresh failed: {e}")
+
+
+async def _watch_loop():
+    try:
+        await asyncio.to_thread(_watch)
+    except OperationFailure as e:
+        log.warning(f"Bidder change stream is not available ({e}), falling back to ttl refresh")
+        await _ttl_loop()
+
+
+def _watch():
+    global _change_stream
+    while not _stopped:
+        try:
+            with db.get_bidder_collection().watch() as change_stream:
+                _change_stream = change_stream
+                # reload after (re)opening the stream to pick up changes missed while it was closed
+                refresh_bidders()
+                for _ in change_stream:
+                    refresh_bidders()
+        except OperationFailure:
+            raise
+        except PyMongoError as e:
+            if not _stopped:
+                log.error(f"Bidder change stream failed: {e}")
@@ -0,0 +1,105 @@
+import logging as log
+import queue
+import threading
+import time
+from typing import Awaitable, Callable, List, Tuple
+
+from prometheus_client import Counter, Gauge, Histogram
+
+from ad_publisher import config
+
+QUEUE_DEPTH = Gauge("ad_publisher_auction_finalization_queue_depth", "Auctions waiting for background finalization")
+LAG = Histogram("ad_publisher_auction_finalization_lag_seconds",
+                "Time from the ad response to the finished auction record", buckets=(
+                    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0))
+RETRIES = Counter("ad_publisher_auction_finalization_retries", "Failed auction finalization attempts that are retried")
+INLINE = Counter("ad_publisher_auction_finalization_inline",
+                 "Auctions finalized in the request because the finalization queue was full")
+ABANDONED = Counter("ad_publisher_auction_finalization_abandoned",
+                    "Auctions left unfinished because finalization kept failing until shutdown")
+
+# how often idle workers check whether the finalizer is stopping
+_STOP_POLL_S = 0.1
+
+# (auction id, finalize, submitted at)
+_queue: "queue.Queue[Tuple[str, Callable[[], None], float]]" = queue.Queue()
+_workers: List[threading.Thread] = []
+_stopping = threading.Event()
+
+
+def submit(auction_id: str, finalize: Callable[[], None]):
+    """
+    Queues the finalization of an auction. finalize is retried until it succeeds, so it must be idempotent. When the
+    queue is full the auction is finalized by the caller instead, which bounds the backlog without losing auctions.
+    This holds within one process only, queued auctions survive a crash or a restart only with AUCTION_JOURNAL_ENABLED.
+    """
+    if not _enqueue(auction_id, finalize):
+        INLINE.inc()
+        finalize()
+
+
+async def submit_async(auction_id: str, finalize: Callable[[], None], finalize_async: Callable[[], Awaitable[None]]):
+    """
+    submit for callers on the event loop. When the queue is full the auction is finalized with finalize_async, so the
+    blocking finalize never runs on the loop.
+    """
+    if not _enqueue(auction_id, finalize):
+        INLINE.inc()
+        await finalize_async()
+
+
+def start_auction_finalizer():
+    global _queue
+    if not config.AUCTION_JOURNAL_ENABLED:
+        log.warning("Auction finalizer without AUCTION_JOURNAL_ENABLED, queued auctions are lost if the process dies")
+    _queue = queue.Queue(maxsize=config.AUCTION_FINALIZER_QUEUE_SIZE)
+    for i in range(config.AUCTION_FINALIZER_WORKERS):
+        worker = threading.Thread(target=_work, name=f"auction-finalizer-{i}", daemon=True)
+        worker.start()
+        _workers.append(worker)
+
+
+def shutdown_auction_finalizer():
+    """
+    Finalizes the queued auctions and stops the workers. Failing auctions are no longer retried.
+    """
+    # workers exit once the queue is empty, nothing is put on the queue that could block while it is full
+    _stopping.set()
+    for worker in _workers:
+        worker.join()
+
+
+def _enqueue(auction_id: str, finalize: Callable[[], None]) -> bool:
+    try:
+        _queue.put_nowait((auction_id, finalize, time.monotonic()))
+    except queue.Full:
+        return False
+    QUEUE_DEPTH.set(_queue.qsize())
+    return True
+
+
+def _work():
+    while True:
+        try:
+            auction_id, finalize, submitted_at = _queue.get(timeout=_STOP_POLL_S)
+        except queue.Empty:
+            if _stopping.is_set():
+                return
+            continue
+        QUEUE_DEPTH.set(_queue.qsize())
+
+        backoff = config.AUCTION_FINALIZER_RETRY_BACKOFF_S
+        while True:
+            try:
+                finalize()
+                break
+            except Exception as e:
+                if _stopping.is_set():
+                    log.error(f"Auction id={auction_id} left unfinished on shutdown: {e}")
+                    ABANDONED.inc()
+                    break
+                log.warning(f"Finalization of auction id={auction_id} failed, retrying in {backoff} s: {e}")
+                RETRIES.inc()
+                _stopping.wait(backoff)
+                backoff = min(backoff * 2, config.AUCTION_FINALIZER_MAX_BACKOFF_S)
+        LAG.observe(time.monotonic() - submitted_at)
@@ -0,0 +1,131 @@
+import logging as log
+import os
+import threading
+from typing import Any, Dict, TextIO
+
+from bson import ObjectId, json_util
+from pymongo import ReplaceOne
+
+import ad_publisher.db.config as db
+from ad_publisher import config
+
+_journal_file: TextIO | None = None
+# auction id -> auction document with the winners known so far
+_open_auctions: Dict[str, Dict[str, Any]] = {}
+_lock = threading.Lock()
+# entries are appended under _lock and made durable under _sync_lock, one fsync covers every entry appended before it
+_sync_lock = threading.Lock()
+_appended = 0
+_synced = 0
+
+
+def init_auction_journal():
+    """
+    Writes the auctions left unfinished by a previous run to Mongo and starts a new journal.
+    """
+    global _journal_file
+    _recover()
+    _journal_file = open(config.AUCTION_JOURNAL_PATH, "w")
+
+
+def shutdown_auction_journal():
+    if _journal_file is not None:
+        _journal_file.close()
+
+
+def record_started(auction_id: str, auction_doc: Dict[str, Any]):
+    with _lock:
+        _open_auctions[auction_id] = auction_doc
+        sequence = _append({"event": "started", "id": auction_id, "doc": auction_doc})
+    _sync(sequence)
+
+
+def record_winners(auction_id: str, winners: Dict[str, Any]):
+    with _lock:
+        if auction_id in _open_auctions:
+            _apply_winners(_open_auctions[auction_id], winners)
+        sequence = _append({"event": "winners", "id": auction_id, "winners": winners})
+    _sync(sequence)
+
+
+def record_committed(auction_id: str):
+    with _lock:
+        _open_auctions.pop(auction_id, None)
+        sequence = _append({"event": "committed", "id": auction_id})
+        compact = _journal_file.tell() > config.AUCTION_JOURNAL_MAX_BYTES
+    if compact:
+        _compact()
+    else:
+        _sync(sequence)
+
+
+def _append(entry: Dict[str, Any]) -> int:
+    global _appended
+    _journal_file.write(json_util.dumps(entry) + "\n")
+    _journal_file.flush()
+    _appended += 1
+    return _appended
+
+
+def _sync(sequence: int):
+    global _synced
+    with _sync_lock:
+        if _synced >= sequence:
+            return
+        with _lock:
+            appended = _appended
+        os.fsync(_journal_file.fileno())
+        _synced = appended
+
+
+def _compact():
+    """
+    Replaces the journal by one with the open auctions only, so committed auctions do not accumulate under steady
+    load.
+    """
+    global _journal_file, _synced
+    compacted_path = config.AUCTION_JOURNAL_PATH + ".compact"
+    with _sync_lock, _lock:
+        if _journal_file.tell() <= config.AUCTION_JOURNAL_MAX_BYTES:
+            return
+        with open(compacted_path, "w") as compacted_file:
+            for auction_id, auction_doc in _open_auctions.items():
+                compacted_file.write(json_util.dumps({"event": "started", "id": auction_id, "doc": auction_doc}) + "\n")
+            compacted_file.flush()
+            os.fsync(compacted_file.fileno())
+        os.replace(compacted_path, config.AUCTION_JOURNAL_PATH)
+        _journal_file.close()
+        _journal_file = open(config.AUCTION_JOURNAL_PATH, "a")
+        _synced = _appended
+    log.debug(f"Auction journal compacted to {len(_open_auctions)} open auctions")
+
+
+def _apply_winners(auction_doc: Dict[str, Any], winners: Dict[str, Any]):
+    for imp in auction_doc["ad_request"]["imps"]:
+        if imp["id"] in winners:
+            imp["ext"] = {**(imp["ext"] if isinstance(imp["ext"], dict) else {}), "winner": winners[imp["id"]]}
+
+
+def _recover():
+    if not os.path.exists(config.AUCTION_JOURNAL_PATH):
+        return
+
+    auction_docs = {}
+    with open(config.AUCTION_JOURNAL_PATH, "r") as journal_file:
+        for line in journal_file:
+            try:
+                entry = json_util.loads(line)
+            except ValueError:
+                log.warning("Skipping a torn auction journal entry")
+                continue
+            if entry["event"] == "started":
+                auction_docs[entry["id"]] = entry["doc"]
+            elif entry["event"] == "winners" and entry["id"] in auction_docs:
+                _apply_winners(auction_docs[entry["id"]], entry["winners"])
+            elif entry["event"] == "committed":
+                auction_docs.pop(entry["id"], None)
+
+    if auction_docs:
+        db.get_auction_collection().bulk_write([ReplaceOne({"_id": ObjectId(auction_id)}, doc, upsert=True)
+                                                for auction_id, doc in auction_docs.items()], ordered=False)
+        log.warning(f"Recovered {len(auction_docs)} unfinished auctions from the journal")
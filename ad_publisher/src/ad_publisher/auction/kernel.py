@@ -0,0 +1,85 @@
+from typing import NamedTuple
+
+import numpy as np
+
+
+class Clearing(NamedTuple):
+    winner: np.ndarray
+    """
+    Index of the winning bid per impression, -1 when the impression has no eligible bid.
+    """
+    first_price: np.ndarray
+    """
+    Price of the winning bid per impression, NaN without a winner.
+    """
+    second_price: np.ndarray
+    """
+    Price of the runner-up bid per impression, the impression's reserved price when the winner is the only eligible bid
+    and NaN without a winner.
+    """
+
+
+def clear_auctions(prices: np.ndarray, imp_idx: np.ndarray, imp_n: int,
+                   reserved_price: float | np.ndarray) -> Clearing:
+    """
+    Clears the auctions of all impressions at once. prices and imp_idx are parallel columns of the bids, imp_idx holds
+    the impression of every bid as an index in [0, imp_n). reserved_price is either shared by all impressions or an
+    array with one per impression. Among equal prices the earlier bid wins.
+    """
+    winner = np.full(imp_n, -1, dtype=np.int64)
+    first_price = np.full(imp_n, np.nan)
+    second_price = np.full(imp_n, np.nan)
+
+    reserved_prices = np.broadcast_to(np.asarray(reserved_price, dtype=np.float64), (imp_n,))
+    eligible = np.flatnonzero(prices >= reserved_prices[imp_idx])
+    if eligible.size == 0:
+        return Clearing(winner, first_price, second_price)
+
+    # grouped by impression, the highest price first within a group and the bid order breaking ties
+    order = eligible[np.lexsort((eligible, -prices[eligible], imp_idx[eligible]))]
+    sorted_imps = imp_idx[order]
+    group_start = np.flatnonzero(np.concatenate(([True], sorted_imps[1:] != sorted_imps[:-1])))
+    group_imps = sorted_imps[group_start]
+
+    winner[group_imps] = order[group_start]
+    first_price[group_imps] = prices[order[group_start]]
+
+    runner_up = group_start + 1
+    has_runner_up = runner_up < order.size
+    has_runner_up[has_runner_up] = sorted_imps[runner_up[has_runner_up]] == group_imps[has_runner_up]
+    group_second_price = reserved_prices[group_imps].copy()
+    group_second_price[has_runner_up] = prices[order[runner_up[has_runner_up]]]
+    second_price[group_imps] = group_second_price
+
+    return Clearing(winner, first_price, second_price)
+
+
+def rank_slots(prices: np.ndarray, slot_n: int, reserved_price: float) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Ranks the bids of a multi-slot auction, where every bid competes for every slot. Returns the indices of the bids
+    taking the slots, best slot first, and the prices of the first slot_n + 1 ranks padded with the reserved price.
+    Among equal prices the earlier bid ranks higher.
+    """
+    eligible = np.flatnonzero(prices >= reserved_price)
+    ranked = eligible[np.argsort(-prices[eligible], kind="stable")][:slot_n + 1]
+    ranked_prices = np.full(slot_n + 1, float(reserved_price))
+    ranked_prices[:ranked.size] = prices[ranked]
+    return ranked[:slot_n], ranked_prices
+
+
+def gsp_prices(ranked_prices: np.ndarray) -> np.ndarray:
+    """
+    Generalized second price: every slot pays the price of the rank below it.
+    """
+    return ranked_prices[1:]
+
+
+def vcg_prices(ranked_prices: np.ndarray, slot_weights: np.ndarray) -> np.ndarray:
+    """
+    VCG price per impression of every slot: the value the winner takes away from the bids ranked below it, each of
+    which would move one slot up, divided by the weight of the winner's slot. slot_weights are the relative
+    click-through rates of the slots, best slot first.
+    """
+    weights = np.append(slot_weights, 0.0)
+    externalities = (weights[:-1] - weights[1:]) * ranked_prices[1:]
+    return np.cumsum(externalities[::-1])[::-1] / slot_weights
@@ -2,7 +2,7 @@ import datetime
 from enum import Enum
 from typing import List, Any
 
-from pydantic import BaseModel, ConfigDict, field_serializer
+from pydantic import BaseModel, ConfigDict, Field, field_serializer
 
 from ad_bidder_common.model.openrtb.response import SeatBid
 from ad_bidder_common.model.openrtb.util import MongoDbMixin
@@ -28,11 +28,13 @@ class Auction(BaseModel, MongoDbMixin):
     algorithm: AuctionAlgorithm
     bids: List[SeatBid] = None
     status: AuctionStatus = AuctionStatus.PENDING
+    timed_out_bidders: List[str] = []
+    mongo_ops: int = Field(default=0, exclude=True)
 
     @field_serializer("algorithm", mode="wrap")
     @classmethod
     def algorithm_serializer(cls, algorithm: Any, handler, info):
-        return str(algorithm)
+        return algorithm.type.value
 
 
 class BidStatus(Enum):
@@ -0,0 +1,154 @@
+import asyncio
+import logging as log
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, NamedTuple
+
+from prometheus_client import Counter, Gauge, Histogram
+
+from ad_bidder_common.model.openrtb.response import Bid
+from ad_publisher import ad_bidder_client, config
+from ad_publisher.ad.model import AdBidder
+from ad_publisher.auction.model import BidStatus
+
+QUEUE_DEPTH = Gauge("ad_publisher_loss_notice_queue_depth", "Loss notices waiting to be sent")
+OLDEST_AGE = Gauge("ad_publisher_loss_notice_oldest_age_seconds", "Age of the oldest queued loss notice")
+LAG = Histogram("ad_publisher_loss_notice_lag_seconds", "Time from queuing a loss notice to its delivery")
+DROPPED = Counter("ad_publisher_loss_notices_dropped", "Loss notices dropped without delivery", ["reason"])
+
+
+class DispatchResult(NamedTuple):
+    # largest batch sent to one bidder, a full batch means more notices are waiting
+    largest_batch: int
+    failed: bool
+
+
+class _PendingNotice:
+    __slots__ = ("bid", "queued_at", "attempts")
+
+    def __init__(self, bid: Bid, queued_at: float):
+        self.bid = bid
+        self.queued_at = queued_at
+        self.attempts = 0
+
+
+_pending: Dict[str, Deque[_PendingNotice]] = {}
+_bidders: Dict[str, AdBidder] = {}
+_size = 0
+_lock = threading.Lock()
+_dispatch_task: asyncio.Task | None = None
+
+
+def submit(bidder: AdBidder, bids: List[Bid]):
+    """
+    Queues loss notices for the bidder without waiting for their delivery. When the queue is full the oldest
+    notices are dropped.
+    """
+    global _size
+    queued_at = time.monotonic()
+    with _lock:
+        _bidders[bidder.id] = bidder
+        _pending.setdefault(bidder.id, deque()).extend(_PendingNotice(bid, queued_at) for bid in bids)
+        _size += len(bids)
+        _drop_overflow()
+        QUEUE_DEPTH.set(_size)
+
+
+async def dispatch() -> DispatchResult:
+    """
+    Sends one batch of queued loss notices per bidder, concurrently across bidders.
+    """
+    global _size
+    with _lock:
+        batches = {}
+        for bidder_id, notices in _pending.items():
+            if notices:
+                batches[bidder_id] = [notices.popleft() for _ in range(min(len(notices),
+                                                                           config.LOSS_NOTICE_BATCH_SIZE))]
+        _size -= sum(map(len, batches.values()))
+        QUEUE_DEPTH.set(_size)
+
+    delivered = await asyncio.gather(*(_send(bidder_id, batch) for bidder_id, batch in batches.items()))
+
+    with _lock:
+        oldest = min((notices[0].queued_at for notices in _pending.values() if notices), default=None)
+    OLDEST_AGE.set(time.monotonic() - oldest if oldest is not None else 0)
+    return DispatchResult(max(map(len, batches.values()), default=0), not all(delivered))
+
+
+def start_notice_dispatcher():
+    global _dispatch_task
+    _dispatch_task = asyncio.create_task(_dispatch_loop())
+
+
+async def shutdown_notice_dispatcher():
+    """
+    Delivers the queued loss notices, batch by batch, for at most LOSS_NOTICE_SHUTDOWN_TIMEOUT_S.
+    """
+    if _dispatch_task is not None:
+        _dispatch_task.cancel()
+    try:
+        await asyncio.wait_for(_drain(), config.LOSS_NOTICE_SHUTDOWN_TIMEOUT_S)
+    except asyncio.TimeoutError:
+        with _lock:
+            undelivered = _size
+        DROPPED.labels("shutdown").inc(undelivered)
+        log.warning(f"{undelivered} loss notices left undelivered on shutdown")
+
+
+async def _drain():
+    # failed notices are queued again until their retries are exhausted, so the queue empties
+    backoff = config.LOSS_NOTICE_RETRY_BACKOFF_S
+    while _size > 0:
+        if (await dispatch()).failed:
+            await asyncio.sleep(backoff)
+            backoff *= 2
+
+
+async def _send(bidder_id: str, batch: List[_PendingNotice]) -> bool:
+    global _size
+    try:
+        await ad_bidder_client.post_notices(_bidders[bidder_id], [(BidStatus.LOSS, notice.bid) for notice in batch])
+    except Exception as e:
+        log.warning(f"Loss notices for bidder id={bidder_id} failed, will retry: {e}")
+        retries = []
+        for notice in batch:
+            notice.attempts += 1
+            if notice.attempts <= config.LOSS_NOTICE_MAX_RETRIES:
+                retries.append(notice)
+        if len(retries) < len(batch):
+            DROPPED.labels("retries_exhausted").inc(len(batch) - len(retries))
+        with _lock:
+            _pending[bidder_id].extendleft(reversed(retries))
+            _size += len(retries)
+            _drop_overflow()
+            QUEUE_DEPTH.set(_size)
+        return False
+
+    delivered_at = time.monotonic()
+    for notice in batch:
+        LAG.observe(delivered_at - notice.queued_at)
+    return True
+
+
+def _drop_overflow():
+    global _size
+    while _size > config.LOSS_NOTICE_QUEUE_SIZE:
+        oldest = min((notices for notices in _pending.values() if notices), key=lambda notices: notices[0].queued_at)
+        oldest.popleft()
+        _size -= 1
+        DROPPED.labels("queue_full").inc()
+
+
+async def _dispatch_loop():
+    while True:
+        await asyncio.sleep(config.LOSS_NOTICE_FLUSH_INTERVAL_S)
+        try:
+            # keeps sending while batches are full, so throughput is not capped at one batch per interval
+            while True:
+                result = await dispatch()
+                if result.failed or result.largest_batch < config.LOSS_NOTICE_BATCH_SIZE:
+                    break
+        except Exception as e:
+            log.error(f"Loss notice dispatch failed: {e}")
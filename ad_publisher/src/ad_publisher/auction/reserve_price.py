@@ -0,0 +1,182 @@
+import asyncio
+import logging as log
+import math
+import threading
+from typing import Any, Dict, List, Tuple
+
+from prometheus_client import Gauge
+from pymongo import ReplaceOne
+
+import ad_publisher.db.config as db
+from ad_bidder_common.model.openrtb.request import Impression
+from ad_bidder_common.model.openrtb.response import Bid
+from ad_publisher import config
+from ad_publisher.ad.model import AdRequest
+
+TRACKED_PLACEMENTS = Gauge("ad_publisher_reserve_price_placements", "Placements with clearing price statistics")
+
+
+class P2Quantile:
+    """
+    Streaming estimate of one quantile with the P² algorithm (Jain and Chlamtac): five markers are kept and adjusted
+    on every observation, so both observing and reading the estimate are O(1) in time and memory.
+    """
+
+    def __init__(self, quantile: float):
+        self.quantile = quantile
+        self.count = 0
+        self._heights: List[float] = []
+        self._positions = [0, 1, 2, 3, 4]
+        self._desired = [0.0, 2 * quantile, 4 * quantile, 2 + 2 * quantile, 4.0]
+        self._increments = (0.0, quantile / 2, quantile, (1 + quantile) / 2, 1.0)
+
+    def observe(self, x: float):
+        self.count += 1
+        if self.count <= 5:
+            self._heights.append(x)
+            self._heights.sort()
+            return
+
+        heights, positions = self._heights, self._positions
+        if x < heights[0]:
+            heights[0] = x
+            cell = 0
+        elif x >= heights[4]:
+            heights[4] = x
+            cell = 3
+        else:
+            cell = next(i for i in range(4) if x < heights[i + 1])
+
+        for i in range(cell + 1, 5):
+            positions[i] += 1
+        for i in range(5):
+            self._desired[i] += self._increments[i]
+
+        for i in (1, 2, 3):
+            drift = self._desired[i] - positions[i]
+            if (drift >= 1 and positions[i + 1] - positions[i] > 1) or \
+                    (drift <= -1 and positions[i - 1] - positions[i] < -1):
+                step = 1 if drift > 0 else -1
+                height = self._parabolic(i, step)
+                if not heights[i - 1] < height < heights[i + 1]:
+                    height = heights[i] + step * (heights[i + step] - heights[i]) / (positions[i + step] - positions[i])
+                heights[i] = height
+                positions[i] += step
+
+    def value(self) -> float | None:
+        if self.count == 0:
+            return None
+        if self.count < 5:
+            return self._heights[min(len(self._heights) - 1, math.floor(self.quantile * len(self._heights)))]
+        return self._heights[2]
+
+    def dump(self) -> Dict[str, Any]:
+        # copies, the markers keep changing with new observations while the dump is written
+        return {"quantile": self.quantile, "count": self.count, "heights": list(self._heights),
+                "positions": list(self._positions), "desired": list(self._desired)}
+
+    @classmethod
+    def load(cls, doc: Dict[str, Any]) -> "P2Quantile":
+        sketch = cls(doc["quantile"])
+        sketch.count = doc["count"]
+        sketch._heights = list(doc["heights"])
+        sketch._positions = list(doc["positions"])
+        sketch._desired = list(doc["desired"])
+        return sketch
+
+    def _parabolic(self, i: int, step: int) -> float:
+        heights, positions = self._heights, self._positions
+        return heights[i] + step / (positions[i + 1] - positions[i - 1]) * (
+                (positions[i] - positions[i - 1] + step) * (heights[i + 1] - heights[i]) /
+                (positions[i + 1] - positions[i]) +
+                (positions[i + 1] - positions[i] - step) * (heights[i] - heights[i - 1]) /
+                (positions[i] - positions[i - 1]))
+
+
+# (tagid, device type)
+PlacementKey = Tuple[str | None, int | None]
+
+_sketches: Dict[PlacementKey, P2Quantile] = {}
+_lock = threading.Lock()
+_snapshot_task: asyncio.Task | None = None
+
+
+def apply_floors(ad_request: AdRequest):
+    """
+    Sets bidfloor of every impression to the larger of its own floor and the dynamic floor of its placement, so the
+    floors are enforced by the auction and sent to the bidders.
+    """
+    devicetype = ad_request.device.devicetype
+    for imp in ad_request.imps:
+        imp.bidfloor = max(imp.bidfloor or 0.0, get_floor(imp, devicetype))
+
+
+def get_floor(imp: Impression, devicetype: int | None) -> float:
+    if not config.RESERVE_PRICE_ENABLED:
+        return config.RESERVE_PRICE_DEFAULT
+    sketch = _sketches.get((imp.tagid, devicetype))
+    if sketch is None or sketch.count < config.RESERVE_PRICE_MIN_SAMPLES:
+        return config.RESERVE_PRICE_DEFAULT
+    return max(config.RESERVE_PRICE_MIN, sketch.value())
+
+
+def observe(ad_request: AdRequest, bids: List[Bid]):
+    """
+    Records the highest bid of every impression, i.e. the price it would clear at without a floor. Bids below the floor
+    are included, otherwise the floors would only ever ratchet up.
+    """
+    if not config.RESERVE_PRICE_ENABLED:
+        return
+    highest_prices = {}
+    for bid in bids:
+        if bid.price > highest_prices.get(bid.impid, -math.inf):
+            highest_prices[bid.impid] = bid.price
+
+    devicetype = ad_request.device.devicetype
+    with _lock:
+        for imp in ad_request.imps:
+            if imp.id in highest_prices:
+                key = (imp.tagid, devicetype)
+                sketch = _sketches.get(key)
+                if sketch is None:
+                    sketch = _sketches[key] = P2Quantile(config.RESERVE_PRICE_QUANTILE)
+                sketch.observe(highest_prices[imp.id])
+        TRACKED_PLACEMENTS.set(len(_sketches))
+
+
+def init_reserve_price_engine():
+    for doc in db.get_reserve_price_collection().find():
+        _sketches[(doc["tagid"], doc["devicetype"])] = P2Quantile.load(doc["sketch"])
+    TRACKED_PLACEMENTS.set(len(_sketches))
+    log.debug(f"Reserve price engine loaded {len(_sketches)} placements")
+
+
+def snapshot():
+    # dumped under the lock so that no sketch is torn by a concurrent observe
+    with _lock:
+        docs = [{"tagid": tagid, "devicetype": devicetype, "sketch": sketch.dump()}
+                for (tagid, devicetype), sketch in _sketches.items()]
+    if docs:
+        db.get_reserve_price_collection().bulk_write(
+            [ReplaceOne({"tagid": doc["tagid"], "devicetype": doc["devicetype"]}, doc, upsert=True) for doc in docs],
+            ordered=False)
+
+
+def start_reserve_price_snapshots():
+    global _snapshot_task
+    _snapshot_task = asyncio.create_task(_snapshot_loop())
+
+
+async def shutdown_reserve_price_engine():
+    if _snapshot_task is not None:
+        _snapshot_task.cancel()
+    await asyncio.to_thread(snapshot)
+
+
+async def _snapshot_loop():
+    while True:
+        await asyncio.sleep(config.RESERVE_PRICE_SNAPSHOT_INTERVAL_S)
+        try:
+            await asyncio.to_thread(snapshot)
+        except Exception as e:
+            log.error(f"Reserve price snapshot failed: {e}")
@@ -1,101 +1,402 @@
+import asyncio
 import datetime
 import logging as log
-from typing import List, Dict
+import time
+from collections import defaultdict
+from typing import List, Dict, Tuple
 
+from anyio import from_thread
 from bson import ObjectId
+from prometheus_client import Counter, Histogram
+from pymongo.errors import DuplicateKeyError
 
 import ad_publisher.db.config as db
+from ad_bidder_common.model.openrtb import codec
 from ad_bidder_common.model.openrtb.request import BidRequest, Impression
 from ad_bidder_common.model.openrtb.response import Bid, BidResponse
-from ad_publisher import ad_bidder_client
+from ad_publisher import ad_bidder_client, config
 from ad_publisher.ad.model import AdRequest, AdBidder
-from ad_publisher.auction.algorithm import DefaultAuctionAlgorithm
+from ad_publisher.auction import bidder_health, bidder_registry, finalizer, journal, notice_dispatcher, \
+    reserve_price
+from ad_publisher.auction.algorithm import get_auction_algorithm
 from ad_publisher.auction.model import Auction, BidStatus, AuctionStatus
 
+BIDDER_TIMEOUTS = Counter("ad_publisher_bidder_timeouts", "Bidders dropped from an auction for missing its deadline",
+                          ["bidder"])
+AUCTION_MONGO_OPS = Histogram("ad_publisher_auction_mongo_ops", "Mongo operations issued per auction",
+                              buckets=(1, 2, 3, 5, 8, 13, 21, 34, 55))
+
 
 def run_auction(ad_request: AdRequest) -> Dict[str, str]:
-    _insert_imps_into_db(ad_request.imps)
+    reserve_price.apply_floors(ad_request)
+    imp_ops = _insert_imps_into_db(ad_request.imps)
     auction = _create_auction(ad_request)
+    auction.mongo_ops += imp_ops
+    log.info(f"Auction id={auction.id} started")
+
+    # run_auction is called from the threadpool, the bidder fan-out runs concurrently on the app event loop
+    bidder_responses = from_thread.run(_get_bids, auction)
+    bidder_bids = [(bidder, bid) for bidder, bid_response in bidder_responses
+                   for seat_bid in bid_response.seatbid for bid in seat_bid.bid]
+
+    bids = [bid for _, bid in bidder_bids]
+    imp_floors = {imp.id: imp.bidfloor for imp in auction.ad_request.imps}
+    imp_winner_bids = auction.algorithm.calc_winner(bids, imp_floors, list(imp_floors),
+                                                    [bidder.id for bidder, _ in bidder_bids])
+    reserve_price.observe(auction.ad_request, bids)
+    imp_html = _notify_won_bidders(imp_winner_bids, bidder_bids)
+    if config.AUCTION_EARLY_RETURN:
+        # the caller only needs the winners' html, the auction record is finished in the background
+        finalizer.submit(auction.id, lambda: _finalize_auction(auction, imp_winner_bids))
+    else:
+        _finalize_auction(auction, imp_winner_bids)
+    return imp_html
+
+
+async def run_auction_async(ad_request: AdRequest) -> Dict[str, str]:
+    reserve_price.apply_floors(ad_request)
+    imp_ops = await _insert_imps_into_db_async(ad_request.imps)
+    auction = await _create_auction_async(ad_request)
+    auction.mongo_ops += imp_ops
     log.info(f"Auction id={auction.id} started")
 
-    bidders = auction.bidders
-    seat_bids = []
-    for bidder in bidders:
-        bid_response = _get_bid(bidder, auction.ad_request)
-        seat_bids += bid_response.seatbid
+    bidder_responses = await _get_bids(auction)
+    bidder_bids = [(bidder, bid) for bidder, bid_response in bidder_responses
+                   for seat_bid in bid_response.seatbid for bid in seat_bid.bid]
+
+    bids = [bid for _, bid in bidder_bids]
+    imp_floors = {imp.id: imp.bidfloor for imp in auction.ad_request.imps}
+    imp_winner_bids = auction.algorithm.calc_winner(bids, imp_floors, list(imp_floors),
+                                                    [bidder.id for bidder, _ in bidder_bids])
+    reserve_price.observe(auction.ad_request, bids)
+    imp_html = await _notify_won_bidders_async(imp_winner_bids, bidder_bids)
+    if config.AUCTION_EARLY_RETURN:
+        # background finalization runs on the finalizer threads with the sync client, a full queue falls back to
+        # the async client so that the event loop is never blocked
+        await finalizer.submit_async(auction.id, lambda: _finalize_auction(auction, imp_winner_bids),
+                                     lambda: _finalize_auction_async(auction, imp_winner_bids))
+    else:
+        await _finalize_auction_async(auction, imp_winner_bids)
+    return imp_html
+
 
-    bids = [bid for seat_bid in seat_bids for bid in seat_bid.bid]
-    imp_winner_bids = auction.algorithm.calc_winner(bids, auction.reserved_price)
-    imp_html = _notify_won_bidders(imp_winner_bids, bids)
+def _finalize_auction(auction: Auction, imp_winner_bids: Dict[str, Bid]):
+    """
+    Stores the winners and finishes the auction. Safe to repeat, background finalization retries it until it succeeds.
+    """
     _update_winners_in_imps(auction, imp_winner_bids)
     _finish_auction(auction)
     log.info(f"Auction id={auction.id} finished")
-    return imp_html
+
+
+async def _finalize_auction_async(auction: Auction, imp_winner_bids: Dict[str, Bid]):
+    await _update_winners_in_imps_async(auction, imp_winner_bids)
+    await _finish_auction_async(auction)
+    log.info(f"Auction id={auction.id} finished")
 
 
 def _update_winners_in_imps(auction: Auction, imp_winner_bids: dict[str, Bid]):
+    if config.AUCTION_JOURNAL_ENABLED:
+        journal.record_winners(auction.id, _winner_docs(imp_winner_bids))
+    if config.AUCTION_SINGLE_WRITE:
+        _set_winners_in_imps(auction, imp_winner_bids)
+        return
+
+    for impid in imp_winner_bids:
+        db.get_auction_collection().update_one(*_winner_update(auction, impid, imp_winner_bids[impid]))
+        auction.mongo_ops += 1
+
+
+async def _update_winners_in_imps_async(auction: Auction, imp_winner_bids: dict[str, Bid]):
+    if config.AUCTION_JOURNAL_ENABLED:
+        await asyncio.to_thread(journal.record_winners, auction.id, _winner_docs(imp_winner_bids))
+    if config.AUCTION_SINGLE_WRITE:
+        _set_winners_in_imps(auction, imp_winner_bids)
+        return
+
     for impid in imp_winner_bids:
-        db.get_auction_collection().update_one({
-            "_id": ObjectId(auction.id),
-            "ad_request.imps.id": impid
-        }, {"$set": {
-            "ad_request.imps.$.ext.winner": imp_winner_bids[impid].dump_mongo()
-        }})
+        await db.get_async_auction_collection().update_one(*_winner_update(auction, impid, imp_winner_bids[impid]))
+        auction.mongo_ops += 1
+
+
+def _set_winners_in_imps(auction: Auction, imp_winner_bids: dict[str, Bid]):
+    """
+    Stores the winners in the in-memory auction, they are written with the auction when it finishes.
+    """
+    for imp in auction.ad_request.imps:
+        if imp.id in imp_winner_bids:
+            imp.ext = {**(imp.ext if isinstance(imp.ext, dict) else {}), "winner": imp_winner_bids[imp.id].dump_mongo()}
+
+
+def _winner_docs(imp_winner_bids: dict[str, Bid]) -> Dict[str, dict]:
+    return {impid: winner_bid.dump_mongo() for impid, winner_bid in imp_winner_bids.items()}
+
+
+def _winner_update(auction: Auction, impid: str, winner_bid: Bid) -> Tuple[dict, dict]:
+    return {
+        "_id": ObjectId(auction.id),
+        "ad_request.imps.id": impid
+    }, {"$set": {
+        "ad_request.imps.$.ext.winner": winner_bid.dump_mongo()
+    }}
 
 
 def _create_auction(ad_request: AdRequest) -> Auction:
-    reserved_price = _get_reserved_price()
-    bidders = _get_bidders()
-    algorithm = DefaultAuctionAlgorithm()
-    start_time = datetime.datetime.now()
-    auction = Auction(reserved_price=reserved_price, ad_request=ad_request,
-                      bidders=bidders, algorithm=algorithm, start_time=start_time)
+    auction = _build_auction(ad_request)
+    if config.AUCTION_SINGLE_WRITE:
+        auction.id = str(ObjectId())
+    else:
+        insert_result = db.get_auction_collection().insert_one(auction.dump_mongo())
+        auction.id = str(insert_result.inserted_id)
+        auction.mongo_ops += 1
+    if config.AUCTION_JOURNAL_ENABLED:
+        journal.record_started(auction.id, auction.dump_mongo())
+    log.debug(f"Auction created: {auction}")
 
-    insert_result = db.get_auction_collection().insert_one(auction.dump_mongo())
-    auction.id = str(insert_result.inserted_id)
+    return auction
+
+
+async def _create_auction_async(ad_request: AdRequest) -> Auction:
+    auction = _build_auction(ad_request)
+    if config.AUCTION_SINGLE_WRITE:
+        auction.id = str(ObjectId())
+    else:
+        insert_result = await db.get_async_auction_collection().insert_one(auction.dump_mongo())
+        auction.id = str(insert_result.inserted_id)
+        auction.mongo_ops += 1
+    if config.AUCTION_JOURNAL_ENABLED:
+        await asyncio.to_thread(journal.record_started, auction.id, auction.dump_mongo())
     log.debug(f"Auction created: {auction}")
 
     return auction
 
 
-def _get_bid(bidder: AdBidder, ad_request: AdRequest) -> BidResponse:
-    bid_request = BidRequest(imp=ad_request.imps, device=ad_request.device, user=ad_request.user)
-    insert_result = db.get_bid_request_collection().insert_one(bid_request.dump_mongo())
+def _build_auction(ad_request: AdRequest) -> Auction:
+    # the floors of the single impressions are their bidfloor, this is the lowest of them
+    reserved_price = min((imp.bidfloor for imp in ad_request.imps), default=config.RESERVE_PRICE_DEFAULT)
+    bidders = _get_bidders()
+    algorithm = get_auction_algorithm(ad_request.auction_algorithm)
+    start_time = datetime.datetime.now()
+    return Auction(reserved_price=reserved_price, ad_request=ad_request,
+                   bidders=bidders, algorithm=algorithm, start_time=start_time)
+
+
+async def _get_bids(auction: Auction) -> List[Tuple[AdBidder, BidResponse]]:
+    bidders = [bidder for bidder in auction.bidders if bidder_health.allow(bidder.id)]
+    if not bidders:
+        return []
+
+    tmax = config.AUCTION_TMAX_MS
+    # the bid request is stored and encoded once per auction, only the request id differs between bidders
+    try:
+        bid_request_bodies = await _create_bid_requests(auction, bidders, tmax)
+    except BaseException:
+        # no bid request went out, half-open breakers must not wait for the outcome of their probe
+        for bidder in bidders:
+            bidder_health.release_probe(bidder.id)
+        raise
+    started = time.monotonic()
+    bidder_tasks = {asyncio.create_task(_get_bid(bidder, bid_request_bodies[bidder.id])): bidder
+                    for bidder in bidders}
+
+    done, pending = await asyncio.wait(bidder_tasks, timeout=tmax / 1000)
+    for task in pending:
+        task.cancel()
+        bidder = bidder_tasks[task]
+        auction.timed_out_bidders.append(bidder.id)
+        bidder_health.record_failure(bidder.id, time.monotonic() - started)
+        BIDDER_TIMEOUTS.labels(bidder.id).inc()
+    if pending:
+        log.warning(f"Auction id={auction.id}: bidders {auction.timed_out_bidders} missed the {tmax} ms deadline")
+
+    bidder_responses = []
+    for task in done:
+        if task.exception() is not None:
+            log.error(f"Auction id={auction.id}: bidder id={bidder_tasks[task].id} failed: {task.exception()}")
+            continue
+        bidder_responses.append((bidder_tasks[task], task.result()))
+    return bidder_responses
+
+
+async def _get_bid(bidder: AdBidder, bid_request_body: bytes) -> BidResponse:
+    started = time.monotonic()
+    try:
+        if config.BIDDER_HEDGING_ENABLED:
+            bid_response = await _post_hedged_bid_request(bidder, bid_request_body)
+        else:
+            bid_response = await ad_bidder_client.post_bid_request(bidder, bid_request_body)
+    except Exception:
+        bidder_health.record_failure(bidder.id, time.monotonic() - started)
+        raise
+    bidder_health.record_success(bidder.id, time.monotonic() - started)
+    return bid_response
+
+
+async def _post_hedged_bid_request(bidder: AdBidder, bid_request_body: bytes) -> BidResponse:
+    """
+    Sends a second, identical bid request when the first one is slower than the bidder's p95 latency and returns the
+    first successful response.
+    """
+    hedge_delay = bidder_health.get_bidder_health(bidder.id).p95()
+    tasks = {asyncio.create_task(ad_bidder_client.post_bid_request(bidder, bid_request_body))}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=hedge_delay)
+        if done:
+            return done.pop().result()
+
+        hedge = asyncio.create_task(ad_bidder_client.post_bid_request(bidder, bid_request_body))
+        tasks.add(hedge)
+        bidder_health.HEDGED_REQUESTS.labels(bidder.id, "sent").inc()
+        error = None
+        while tasks:
+            done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is hedge:
+                        bidder_health.HEDGED_REQUESTS.labels(bidder.id, "won").inc()
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def _create_bid_requests(auction: Auction, bidders: List[AdBidder], tmax: int) -> Dict[str, bytes]:
+    """
+    Returns the encoded bid request per bidder id. Bidders may share a service that keys its bid responses on the
+    request id, so every bidder gets its own id, patched into the one shared encoding.
+    """
+    ad_request = auction.ad_request
+    bid_request = BidRequest(imp=ad_request.imps, device=ad_request.device, user=ad_request.user, tmax=tmax)
+    bidder_request_ids = {bidder.id: str(ObjectId()) for bidder in bidders}
+    bid_request_doc = {**bid_request.dump_mongo(), "bidder_request_ids": bidder_request_ids}
+    if config.AUCTION_PATH_ASYNC:
+        insert_result = await db.get_async_bid_request_collection().insert_one(bid_request_doc)
+    else:
+        insert_result = await asyncio.to_thread(db.get_bid_request_collection().insert_one, bid_request_doc)
     bid_request.id = str(insert_result.inserted_id)
-    return ad_bidder_client.post_bid_request(bidder, bid_request)
+    auction.mongo_ops += 1
+
+    body = codec.encode(bid_request)
+    # id is the first field of the encoded request, so its first occurrence is the request id
+    id_start = body.index(f'"{bid_request.id}"'.encode()) + 1
+    id_end = id_start + len(bid_request.id)
+    return {bidder_id: body[:id_start] + request_id.encode() + body[id_end:]
+            for bidder_id, request_id in bidder_request_ids.items()}
 
 
 def _finish_auction(auction: Auction) -> Auction:
     auction.finish_time = datetime.datetime.now()
-    db.get_auction_collection().update_one({"_id": ObjectId(auction.id)}, {
-        "$set": {"finish_time": auction.finish_time, "status": AuctionStatus.FINISHED.value}})
+    if config.AUCTION_SINGLE_WRITE:
+        auction.status = AuctionStatus.FINISHED
+        try:
+            db.get_auction_collection().insert_one({"_id": ObjectId(auction.id), **auction.dump_mongo()})
+        except DuplicateKeyError:
+            log.debug(f"Auction id={auction.id} was already written by a previous attempt")
+    else:
+        db.get_auction_collection().update_one(*_finish_update(auction))
+    if config.AUCTION_JOURNAL_ENABLED:
+        journal.record_committed(auction.id)
+    auction.mongo_ops += 1
+    AUCTION_MONGO_OPS.observe(auction.mongo_ops)
     return auction
 
 
-def _notify_won_bidders(imp_winner_bids: Dict[str, Bid], bids: List[Bid]) -> Dict[str, str]:
-    imp_html = {}
-    for bid in bids:
-        impid = bid.impid
-        win_bid = imp_winner_bids.get(impid)
-        if win_bid is not None and win_bid.id == bid.id:
-            html = ad_bidder_client.post_notice(BidStatus.WIN, bid)
-            imp_html[impid] = html
+async def _finish_auction_async(auction: Auction) -> Auction:
+    auction.finish_time = datetime.datetime.now()
+    if config.AUCTION_SINGLE_WRITE:
+        auction.status = AuctionStatus.FINISHED
+        try:
+            await db.get_async_auction_collection().insert_one({"_id": ObjectId(auction.id), **auction.dump_mongo()})
+        except DuplicateKeyError:
+            log.debug(f"Auction id={auction.id} was already written by a previous attempt")
+    else:
+        await db.get_async_auction_collection().update_one(*_finish_update(auction))
+    if config.AUCTION_JOURNAL_ENABLED:
+        await asyncio.to_thread(journal.record_committed, auction.id)
+    auction.mongo_ops += 1
+    AUCTION_MONGO_OPS.observe(auction.mongo_ops)
+    return auction
+
+
+def _finish_update(auction: Auction) -> Tuple[dict, dict]:
+    return {"_id": ObjectId(auction.id)}, {
+        "$set": {"finish_time": auction.finish_time, "status": AuctionStatus.FINISHED.value,
+                 "timed_out_bidders": auction.timed_out_bidders}}
+
+
+def _notify_won_bidders(imp_winner_bids: Dict[str, Bid], bidder_bids: List[Tuple[AdBidder, Bid]]) -> Dict[str, str]:
+    bidder_won_bids = _submit_loss_notices(imp_winner_bids, bidder_bids)
+    bid_html = from_thread.run(_post_win_notices, bidder_won_bids)
+    return {impid: bid_html[win_bid.id] for impid, win_bid in imp_winner_bids.items() if win_bid.id in bid_html}
+
+
+async def _notify_won_bidders_async(imp_winner_bids: Dict[str, Bid],
+                                    bidder_bids: List[Tuple[AdBidder, Bid]]) -> Dict[str, str]:
+    bidder_won_bids = _submit_loss_notices(imp_winner_bids, bidder_bids)
+    bid_html = await _post_win_notices(bidder_won_bids)
+    return {impid: bid_html[win_bid.id] for impid, win_bid in imp_winner_bids.items() if win_bid.id in bid_html}
+
+
+def _submit_loss_notices(imp_winner_bids: Dict[str, Bid],
+                         bidder_bids: List[Tuple[AdBidder, Bid]]) -> List[Tuple[AdBidder, List[Bid]]]:
+    """
+    Queues the loss notices and returns the won bids per bidder.
+    """
+    bidders = {}
+    won_bids = defaultdict(list)
+    lost_bids = defaultdict(list)
+    # multi-slot algorithms may place a bid on another impression than its impid, so winners are matched by bid id
+    won_bid_ids = {win_bid.id for win_bid in imp_winner_bids.values()}
+    for bidder, bid in bidder_bids:
+        bidders[bidder.id] = bidder
+        if bid.id in won_bid_ids:
+            won_bids[bidder.id].append(bid)
         else:
-            ad_bidder_client.post_notice(BidStatus.LOSS, bid)
-    return imp_html
+            lost_bids[bidder.id].append(bid)
 
+    # only the winners' html is needed for the response, loss notices are delivered in the background
+    for bidder_id, bids in lost_bids.items():
+        notice_dispatcher.submit(bidders[bidder_id], bids)
+    return [(bidders[bidder_id], bids) for bidder_id, bids in won_bids.items()]
 
-# might be in properties
-def _get_reserved_price() -> float:
-    return 1.0
+
+async def _post_win_notices(bidder_won_bids: List[Tuple[AdBidder, List[Bid]]]) -> Dict[str, str]:
+    results = await asyncio.gather(*(ad_bidder_client.post_notices(bidder, [(BidStatus.WIN, bid) for bid in bids])
+                                     for bidder, bids in bidder_won_bids), return_exceptions=True)
+    bid_html = {}
+    for (bidder, _), result in zip(bidder_won_bids, results):
+        if isinstance(result, Exception):
+            log.error(f"Win notices for bidder id={bidder.id} failed: {result}")
+            continue
+        bid_html.update(result)
+    return bid_html
 
 
 def _get_bidders() -> List[AdBidder]:
-    ad_bidders = list(db.get_bidder_collection().find())
-    return AdBidder.validate_mongo_many(ad_bidders)
+    return list(bidder_registry.get_bidders())
+
+
+def _insert_imps_into_db(imps: list[Impression]) -> int:
+    if not imps:
+        return 0
+    db.get_imp_collection().insert_many(_imp_docs(imps), ordered=False)
+    return 1
+
+
+async def _insert_imps_into_db_async(imps: list[Impression]) -> int:
+    if not imps:
+        return 0
+    await db.get_async_imp_collection().insert_many(_imp_docs(imps), ordered=False)
+    return 1
 
 
-def _insert_imps_into_db(imps: list[Impression]):
+def _imp_docs(imps: list[Impression]) -> List[dict]:
+    # ids are assigned on the client so that all imps go out in a single insert_many
+    docs = []
     for imp in imps:
-        insert_result = db.get_imp_collection().insert_one(imp.dump_mongo())
-        imp.id = str(insert_result.inserted_id)
+        imp_id = ObjectId()
+        imp.id = str(imp_id)
+        docs.append({"_id": imp_id, **imp.dump_mongo()})
+    return docs
@@ -8,3 +8,62 @@ MONGODB_USERNAME = config("MONGODB_USERNAME")
 MONGODB_PASSWORD = config("MONGODB_PASSWORD")
 MONGODB_HOST = config("MONGODB_HOST")
 MONGODB_DB_NAME = config("MONGODB_DB_NAME")
+# BidRequest.tmax sent to bidders, also the deadline of the bidder fan-out
+AUCTION_TMAX_MS = config("AUCTION_TMAX_MS", default=300, cast=int)
+# shared http client to the bidders
+BIDDER_MAX_CONNECTIONS = config("BIDDER_MAX_CONNECTIONS", default=100, cast=int)
+BIDDER_POOL_MAX_CONNECTIONS = config("BIDDER_POOL_MAX_CONNECTIONS", default=1000, cast=int)
+BIDDER_MAX_KEEPALIVE_CONNECTIONS = config("BIDDER_MAX_KEEPALIVE_CONNECTIONS", default=200, cast=int)
+BIDDER_KEEPALIVE_EXPIRY_S = config("BIDDER_KEEPALIVE_EXPIRY_S", default=30.0, cast=float)
+BIDDER_HTTP2 = config("BIDDER_HTTP2", default=False, cast=bool)
+BIDDER_CONNECT_TIMEOUT_S = config("BIDDER_CONNECT_TIMEOUT_S", default=1.0, cast=float)
+BIDDER_READ_TIMEOUT_S = config("BIDDER_READ_TIMEOUT_S", default=2.0, cast=float)
+BIDDER_WRITE_TIMEOUT_S = config("BIDDER_WRITE_TIMEOUT_S", default=1.0, cast=float)
+BIDDER_POOL_TIMEOUT_S = config("BIDDER_POOL_TIMEOUT_S", default=1.0, cast=float)
+# in-memory bidder registry, refreshed on a ttl or by a change stream (replica set only)
+BIDDER_REGISTRY_REFRESH = config("BIDDER_REGISTRY_REFRESH", default="ttl")
+BIDDER_REGISTRY_TTL_S = config("BIDDER_REGISTRY_TTL_S", default=30.0, cast=float)
+# background dispatch of loss notices
+LOSS_NOTICE_QUEUE_SIZE = config("LOSS_NOTICE_QUEUE_SIZE", default=100_000, cast=int)
+LOSS_NOTICE_BATCH_SIZE = config("LOSS_NOTICE_BATCH_SIZE", default=500, cast=int)
+LOSS_NOTICE_FLUSH_INTERVAL_S = config("LOSS_NOTICE_FLUSH_INTERVAL_S", default=0.5, cast=float)
+LOSS_NOTICE_MAX_RETRIES = config("LOSS_NOTICE_MAX_RETRIES", default=3, cast=int)
+# first backoff between retry passes when draining on shutdown, doubled after every failed pass
+LOSS_NOTICE_RETRY_BACKOFF_S = config("LOSS_NOTICE_RETRY_BACKOFF_S", default=0.1, cast=float)
+LOSS_NOTICE_SHUTDOWN_TIMEOUT_S = config("LOSS_NOTICE_SHUTDOWN_TIMEOUT_S", default=10.0, cast=float)
+# build the auction in memory and write it once when it finishes
+AUCTION_SINGLE_WRITE = config("AUCTION_SINGLE_WRITE", default=False, cast=bool)
+# local journal of unfinished auctions in both write modes, compacted to the open auctions past the max size
+AUCTION_JOURNAL_ENABLED = config("AUCTION_JOURNAL_ENABLED", default=False, cast=bool)
+AUCTION_JOURNAL_PATH = config("AUCTION_JOURNAL_PATH", default="auction.journal")
+AUCTION_JOURNAL_MAX_BYTES = config("AUCTION_JOURNAL_MAX_BYTES", default=64 * 1024 * 1024, cast=int)
+# per-bidder circuit breaker over a rolling window of bid request outcomes
+BIDDER_BREAKER_ENABLED = config("BIDDER_BREAKER_ENABLED", default=True, cast=bool)
+BIDDER_HEALTH_WINDOW = config("BIDDER_HEALTH_WINDOW", default=200, cast=int)
+BIDDER_BREAKER_MIN_SAMPLES = config("BIDDER_BREAKER_MIN_SAMPLES", default=20, cast=int)
+BIDDER_BREAKER_ERROR_RATE = config("BIDDER_BREAKER_ERROR_RATE", default=0.5, cast=float)
+# requests slower than tmax are cancelled and count as failures, so the p95 of successful ones stays below tmax
+BIDDER_BREAKER_P95_MS = config("BIDDER_BREAKER_P95_MS", default=0.7 * AUCTION_TMAX_MS, cast=float)
+BIDDER_BREAKER_COOLDOWN_S = config("BIDDER_BREAKER_COOLDOWN_S", default=5.0, cast=float)
+# second request to a bidder that is slower than its p95
+BIDDER_HEDGING_ENABLED = config("BIDDER_HEDGING_ENABLED", default=False, cast=bool)
+# first_price, second_price, gsp or vcg, an ad request may override it
+AUCTION_ALGORITHM = config("AUCTION_ALGORITHM", default="first_price")
+# relative click-through rate of each next slot in multi-slot auctions
+AUCTION_SLOT_WEIGHT_DECAY = config("AUCTION_SLOT_WEIGHT_DECAY", default=0.7, cast=float)
+# dynamic floors per placement (tagid, device type) at a quantile of the observed clearing prices
+RESERVE_PRICE_ENABLED = config("RESERVE_PRICE_ENABLED", default=True, cast=bool)
+RESERVE_PRICE_DEFAULT = config("RESERVE_PRICE_DEFAULT", default=1.0, cast=float)
+RESERVE_PRICE_MIN = config("RESERVE_PRICE_MIN", default=0.01, cast=float)
+RESERVE_PRICE_QUANTILE = config("RESERVE_PRICE_QUANTILE", default=0.3, cast=float)
+RESERVE_PRICE_MIN_SAMPLES = config("RESERVE_PRICE_MIN_SAMPLES", default=100, cast=int)
+RESERVE_PRICE_SNAPSHOT_INTERVAL_S = config("RESERVE_PRICE_SNAPSHOT_INTERVAL_S", default=60.0, cast=float)
+# respond once the winners' html is known and finish the auction record in the background, auctions still queued
+# survive a crash or a restart only with AUCTION_JOURNAL_ENABLED
+AUCTION_EARLY_RETURN = config("AUCTION_EARLY_RETURN", default=False, cast=bool)
+AUCTION_FINALIZER_WORKERS = config("AUCTION_FINALIZER_WORKERS", default=4, cast=int)
+AUCTION_FINALIZER_QUEUE_SIZE = config("AUCTION_FINALIZER_QUEUE_SIZE", default=10_000, cast=int)
+AUCTION_FINALIZER_RETRY_BACKOFF_S = config("AUCTION_FINALIZER_RETRY_BACKOFF_S", default=0.5, cast=float)
+AUCTION_FINALIZER_MAX_BACKOFF_S = config("AUCTION_FINALIZER_MAX_BACKOFF_S", default=30.0, cast=float)
+# async auction path with motor, otherwise auctions run in the threadpool with pymongo
+AUCTION_PATH_ASYNC = config("AUCTION_PATH_ASYNC", default=True, cast=bool)
@@ -1,5 +1,6 @@
 import logging as log
 
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection
 from pymongo import MongoClient
 from pymongo.collection import Collection
 
@@ -12,12 +13,23 @@ _auction_collection: Collection | None = None
 _bidder_collection: Collection | None = None
 _bid_request_collection: Collection | None = None
 _imp_collection: Collection | None = None
+_reserve_price_collection: Collection | None = None
+
+_async_mongodb_client: AsyncIOMotorClient | None = None
+
+_async_auction_collection: AsyncIOMotorCollection | None = None
+_async_bid_request_collection: AsyncIOMotorCollection | None = None
+_async_imp_collection: AsyncIOMotorCollection | None = None
+
+
+def _mongodb_url() -> str:
+    return f"mongodb://{config.MONGODB_USERNAME}:{config.MONGODB_PASSWORD}@{config.MONGODB_HOST}"
 
 
 def init_db_client():
-    global _mongodb_client, _test_collection, _auction_collection, _bidder_collection, _bid_request_collection, _imp_collection
-    url = f"mongodb://{config.MONGODB_USERNAME}:{config.MONGODB_PASSWORD}@{config.MONGODB_HOST}"
-    _mongodb_client = MongoClient(url, serverSelectionTimeoutMS=3000)
+    global _mongodb_client, _test_collection, _auction_collection, _bidder_collection, _bid_request_collection, _imp_collection, \
+        _reserve_price_collection
+    _mongodb_client = MongoClient(_mongodb_url(), serverSelectionTimeoutMS=3000)
     _mongodb_client.server_info()
     log.debug("Connected to the MongoDB database!")
 
@@ -27,10 +39,25 @@ def init_db_client():
     _bidder_collection = db.bidder
     _bid_request_collection = db.bid_request
     _imp_collection = db.imp
+    _reserve_price_collection = db.reserve_price
+
+
+async def init_async_db_client():
+    global _async_mongodb_client, _async_auction_collection, _async_bid_request_collection, _async_imp_collection
+    _async_mongodb_client = AsyncIOMotorClient(_mongodb_url(), serverSelectionTimeoutMS=3000)
+    await _async_mongodb_client.server_info()
+    log.debug("Connected to the MongoDB database (async)!")
+
+    db = _async_mongodb_client[config.MONGODB_DB_NAME]
+    _async_auction_collection = db.auction
+    _async_bid_request_collection = db.bid_request
+    _async_imp_collection = db.imp
 
 
 def shutdown_db_client():
     _mongodb_client.close()
+    if _async_mongodb_client is not None:
+        _async_mongodb_client.close()
 
 
 def get_test_collection() -> Collection:
@@ -51,3 +78,19 @@ def get_bid_request_collection() -> Collection:
 
 def get_imp_collection() -> Collection:
     return _imp_collection
+
+
+def get_reserve_price_collection() -> Collection:
+    return _reserve_price_collection
+
+
+def get_async_auction_collection() -> AsyncIOMotorCollection:
+    return _async_auction_collection
+
+
+def get_async_bid_request_collection() -> AsyncIOMotorCollection:
+    return _async_bid_request_collection
+
+
+def get_async_imp_collection() -> AsyncIOMotorCollection:
+    return _async_imp_collection
@@ -1,10 +1,20 @@
+import asyncio
+
 from fastapi import FastAPI
 from prometheus_fastapi_instrumentator import Instrumentator
 
 from ad_publisher import config
+from ad_publisher.ad_bidder_client import init_http_client, shutdown_http_client
+from ad_publisher.auction.finalizer import start_auction_finalizer, shutdown_auction_finalizer
+from ad_publisher.auction.journal import init_auction_journal, shutdown_auction_journal
+from ad_publisher.auction.bidder_registry import init_bidder_registry, start_bidder_registry_refresh, \
+    shutdown_bidder_registry
 from ad_publisher.ad.controller import router as ad_router
+from ad_publisher.auction.reserve_price import init_reserve_price_engine, start_reserve_price_snapshots, \
+    shutdown_reserve_price_engine
+from ad_publisher.auction.notice_dispatcher import start_notice_dispatcher, shutdown_notice_dispatcher
 from ad_publisher.constants import *
-from ad_publisher.db.config import init_db_client, shutdown_db_client
+from ad_publisher.db.config import init_db_client, init_async_db_client, shutdown_db_client
 from ad_publisher.log import configure_logging
 
 if config.DEBUG:
@@ -20,11 +30,32 @@ instrumentator = Instrumentator().instrument(app)
 
 
 @app.on_event("startup")
-def startup():
+async def startup():
     init_db_client()
+    if config.AUCTION_PATH_ASYNC:
+        await init_async_db_client()
+    if config.AUCTION_JOURNAL_ENABLED:
+        init_auction_journal()
+    init_http_client()
+    init_bidder_registry()
+    start_bidder_registry_refresh()
+    start_notice_dispatcher()
+    if config.AUCTION_EARLY_RETURN:
+        start_auction_finalizer()
+    if config.RESERVE_PRICE_ENABLED:
+        init_reserve_price_engine()
+        start_reserve_price_snapshots()
     instrumentator.expose(app)
 
 
 @app.on_event("shutdown")
-def shutdown():
+async def shutdown():
+    shutdown_bidder_registry()
+    if config.AUCTION_EARLY_RETURN:
+        await asyncio.to_thread(shutdown_auction_finalizer)
+    await shutdown_notice_dispatcher()
+    if config.RESERVE_PRICE_ENABLED:
+        await shutdown_reserve_price_engine()
+    await shutdown_http_client()
+    shutdown_auction_journal()
     shutdown_db_client()
@@ -1,4 +1,5 @@
 import logging
+import random
 
 from pydantic import BaseModel
 
@@ -7,6 +8,7 @@ from ad_bidder_common.model.openrtb.util import MongoDbMixin
 
 BIDDER_N = 10
 HTML_N = 10
+CAMPAIGN_N = 100
 
 
 def gen_initial_db_data():
@@ -14,11 +16,12 @@ def gen_initial_db_data():
     _clean_db()
     _gen_bidders()
     _gen_html()
+    _gen_campaigns()
     db.shutdown_db_client()
 
 
 def _clean_db():
-    for col in (db.get_bidder_collection(), db.get_html_collection()):
+    for col in (db.get_bidder_collection(), db.get_html_collection(), db.get_campaign_collection()):
         col.delete_many({})
 
 
@@ -26,9 +29,11 @@ def _gen_bidders():
     class AdBidder(BaseModel, MongoDbMixin):
         id: str
         bid_request_url: str
+        notices_url: str
 
     bid_request_url = "http://ad_bidder/api/v1/bids/request"
-    bidders = [AdBidder(id="dummy", bid_request_url=bid_request_url) for _ in range(BIDDER_N)]
+    notices_url = "http://ad_bidder/api/v1/bids/notices"
+    bidders = [AdBidder(id="dummy", bid_request_url=bid_request_url, notices_url=notices_url) for _ in range(BIDDER_N)]
     bidders = list(map(lambda bidder: bidder.dump_mongo(), bidders))
     insert_result = db.get_bidder_collection().insert_many(bidders)
     logging.debug(f"Inserted bidders: {insert_result}")
@@ -40,5 +45,22 @@ def _gen_html():
     logging.debug(f"Inserted: {insert_result}")
 
 
+def _gen_campaigns():
+    sizes = [(300, 250), (728, 90), (160, 600), (320, 50)]
+    campaigns = [{
+        "name": "campaign" + str(i),
+        "banner_sizes": random.sample(sizes, random.randint(0, 2)),
+        "device_types": random.sample(range(1, 8), random.randint(0, 2)),
+        "os": random.sample(["ios", "android", "windows"], random.randint(0, 1)),
+        "countries": random.sample(["US", "GB", "DE", "FR"], random.randint(0, 2)),
+        "cat": random.sample(["IAB1", "IAB2", "IAB3"], random.randint(0, 1)),
+        "budget": random.choice([None, 10.0, 100.0]),
+        "max_qps": random.choice([None, 50.0, 200.0]),
+        "spent": 0.0,
+    } for i in range(CAMPAIGN_N)]
+    insert_result = db.get_campaign_collection().insert_many(campaigns)
+    logging.debug(f"Inserted campaigns: {insert_result}")
+
+
 if __name__ == '__main__':
     gen_initial_db_data()